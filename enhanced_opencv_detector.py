@@ -2,41 +2,103 @@
 # -*- coding: utf-8 -*-
 """
 Detector OpenCV Aprimorado para Tabelas Complexas
-Focado em detectar todas as tabelas das páginas 1713-1717
+Combina cinco técnicas de detecção por página, com páginas processadas em
+paralelo (um processo por worker, cada um com seu próprio documento aberto)
 """
 
 import os
+import sys
+import multiprocessing
 import cv2
 import numpy as np
 import fitz
 import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
+from multiprocessing.util import Finalize
+from PyQt5.QtCore import QThread, pyqtSignal
 
-class EnhancedTableDetector:
-    """Detector aprimorado para tabelas complexas e sutis"""
+
+# Estado de cada processo worker (um analisador e um documento por processo)
+_worker_engine = None
+
+
+def _init_page_worker(config):
+    """Inicializa o processo worker com seu próprio analisador/documento"""
+    global _worker_engine
+    cv2.setNumThreads(1)  # Paralelismo já vem dos processos e threads por método
+    _worker_engine = EnhancedTableEngine(**config)
+    # Executado na saída normal do processo (atexit não roda em workers do multiprocessing)
+    Finalize(_worker_engine, _worker_engine.close, exitpriority=10)
+
+
+def _detect_page_worker(page_num):
+    """Detecta tabelas em uma página dentro do processo worker"""
+    return _worker_engine.detect_page(page_num)
+
+
+class EnhancedTableEngine:
+    """Análise de tabelas por página, sem Qt (usada também nos processos worker)"""
     
-    def __init__(self):
-        self.pdf_path = "LivrosPDF/Medicina_de_emergencia_abordagem_pratica.pdf"
-        self.target_pages = [1713, 1714, 1715, 1716, 1717]
-        self.output_dir = f"deteccao_aprimorada_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        os.makedirs(self.output_dir, exist_ok=True)
-        
-    def load_page_as_image(self, page_num, dpi=3.0):
-        """Carrega página como imagem em alta resolução"""
-        doc = fitz.open(self.pdf_path)
-        page = doc[page_num - 1]
+    def __init__(self, pdf_path, zoom=3.0, debug=False, output_dir=None):
+        self.pdf_path = pdf_path
+        self.zoom = zoom  # 3.0 = 216 DPI
+        self.debug = debug  # Salvar imagens intermediárias (assíncrono)
+        self.output_dir = output_dir or f"deteccao_aprimorada_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.max_spacing_candidates = 20  # Limite de candidatos por página (espaçamento)
+        self.doc = None
+        self.debug_writer = None
+    
+    def get_document(self):
+        """Documento aberto uma única vez por instância (um por worker)"""
+        if self.doc is None:
+            self.doc = fitz.open(self.pdf_path)
+        return self.doc
+    
+    def close(self):
+        """Fecha o documento e aguarda a gravação das imagens de debug pendentes"""
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
+        if self.debug_writer is not None:
+            self.debug_writer.shutdown(wait=True)
+            self.debug_writer = None
+    
+    def save_debug_image(self, name, image):
+        """Agenda a gravação de uma imagem de debug (somente com debug=True)"""
+        if not self.debug:
+            return
+        if self.debug_writer is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.debug_writer = ThreadPoolExecutor(max_workers=1)
+        self.debug_writer.submit(cv2.imwrite, os.path.join(self.output_dir, name), image)
+    
+    def load_page_as_image(self, page_num):
+        """Carrega página (1-based) como imagem em alta resolução"""
+        page = self.get_document()[page_num - 1]
         
         # DPI muito alto para capturar detalhes sutis
-        mat = fitz.Matrix(dpi, dpi)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
+        mat = fitz.Matrix(self.zoom, self.zoom)
+        pix = page.get_pixmap(matrix=mat, alpha=False)
         
-        # Converter para OpenCV
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Converter para OpenCV direto dos pixels (sem codificar PNG)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR if pix.n == 3 else cv2.COLOR_GRAY2BGR)
         
-        doc.close()
-        return img
+        return img, (page.rect.width, page.rect.height)
+    
+    def detect_page(self, page_num):
+        """Carrega e analisa uma página (1-based); retorna dados serializáveis"""
+        img, page_size = self.load_page_as_image(page_num)
+        tables = self.detect_subtle_tables(img, page_num)
+        
+        return {
+            'page': page_num,
+            'tables': [(int(x), int(y), int(w), int(h), method, float(confidence))
+                       for x, y, w, h, method, confidence in tables],
+            'image_size': img.shape,
+            'page_size': page_size
+        }
     
     def detect_subtle_tables(self, img, page_num):
         """Detecta tabelas sutis com múltiplas técnicas refinadas"""
@@ -45,47 +107,67 @@ class EnhancedTableDetector:
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         
         # Salvar imagem original
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_01_original.png"), img)
-        
-        all_tables = []
-        
-        # Método 1: Detecção ultra-sensível de linhas
-        tables1 = self.detect_ultra_sensitive_lines(gray.copy(), page_num)
-        all_tables.extend(tables1)
-        print(f"      📏 Linhas ultra-sensíveis: {len(tables1)} tabela(s)")
+        self.save_debug_image(f"p{page_num}_01_original.png", img)
         
-        # Método 2: Análise de densidade textual
-        tables2 = self.detect_by_text_density(gray.copy(), page_num)
-        all_tables.extend(tables2)
-        print(f"      📝 Densidade textual: {len(tables2)} tabela(s)")
+        # Pré-processamento compartilhado (somente leitura para todos os métodos)
+        preprocessed = self.preprocess_page(gray)
         
-        # Método 3: Detecção de padrões regulares
-        tables3 = self.detect_regular_patterns(gray.copy(), page_num)
-        all_tables.extend(tables3)
-        print(f"      🔲 Padrões regulares: {len(tables3)} tabela(s)")
-        
-        # Método 4: Análise de espaçamento
-        tables4 = self.detect_by_spacing_analysis(gray.copy(), page_num)
-        all_tables.extend(tables4)
-        print(f"      📐 Análise de espaçamento: {len(tables4)} tabela(s)")
+        methods = [
+            (self.detect_ultra_sensitive_lines, "📏 Linhas ultra-sensíveis"),   # Método 1
+            (self.detect_by_text_density, "📝 Densidade textual"),              # Método 2
+            (self.detect_regular_patterns, "🔲 Padrões regulares"),             # Método 3
+            (self.detect_by_spacing_analysis, "📐 Análise de espaçamento"),     # Método 4
+            (self.detect_by_region_segmentation, "🗂️ Segmentação de regiões"),  # Método 5
+        ]
         
-        # Método 5: Detecção por segmentação de regiões
-        tables5 = self.detect_by_region_segmentation(gray.copy(), page_num)
-        all_tables.extend(tables5)
-        print(f"      🗂️ Segmentação de regiões: {len(tables5)} tabela(s)")
+        # Métodos independentes em paralelo (OpenCV libera o GIL)
+        with ThreadPoolExecutor(max_workers=len(methods)) as executor:
+            futures = [executor.submit(method, preprocessed, page_num) for method, _ in methods]
+            
+            all_tables = []
+            for future, (_, description) in zip(futures, methods):
+                tables = future.result()
+                all_tables.extend(tables)
+                print(f"      {description}: {len(tables)} tabela(s)")
         
         # Consolidar todas as detecções
-        final_tables = self.smart_consolidation(all_tables, img, page_num)
+        final_tables = self.smart_consolidation(all_tables, img, page_num, gray=gray)
         
         # Salvar resultado final
-        self.visualize_final_result(img, final_tables, page_num)
+        if self.debug:
+            self.visualize_final_result(img, final_tables, page_num)
         
         print(f"      ✅ TOTAL FINAL: {len(final_tables)} tabela(s)")
         return final_tables
     
-    def detect_ultra_sensitive_lines(self, gray, page_num):
+    def preprocess_page(self, gray):
+        """Calcula uma vez por página as imagens base usadas pelos métodos
+        
+        Os arrays retornados são compartilhados entre threads e não devem
+        ser modificados in-place pelos métodos de detecção.
+        """
+        # Binarização Otsu (espaçamento e segmentação)
+        _, otsu_binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        
+        # Threshold adaptativo para destacar texto (densidade textual)
+        adaptive_binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                                                cv2.THRESH_BINARY_INV, 15, 10)
+        
+        # Bordas sensíveis (padrões regulares)
+        edges = cv2.Canny(gray, 30, 100, apertureSize=3)
+        
+        return {
+            'gray': gray,
+            'otsu_binary': otsu_binary,
+            'adaptive_binary': adaptive_binary,
+            'edges': edges
+        }
+    
+    def detect_ultra_sensitive_lines(self, preprocessed, page_num):
         """Detecção ultra-sensível de linhas horizontais e verticais"""
         
+        gray = preprocessed['gray']
+        
         # Múltiplos kernels para diferentes espessuras de linha
         kernels = [
             # Linhas muito finas
@@ -112,10 +194,10 @@ class EnhancedTableDetector:
             all_lines = cv2.bitwise_or(all_lines, lines_thresh)
             
             # Salvar para debug
-            cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_02_lines_{i}.png"), lines_thresh)
+            self.save_debug_image(f"p{page_num}_02_lines_{i}.png", lines_thresh)
         
         # Salvar resultado combinado
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_02_all_lines.png"), all_lines)
+        self.save_debug_image(f"p{page_num}_02_all_lines.png", all_lines)
         
         # Encontrar contornos das intersecções
         contours, _ = cv2.findContours(all_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -133,20 +215,19 @@ class EnhancedTableDetector:
         
         return tables
     
-    def detect_by_text_density(self, gray, page_num):
+    def detect_by_text_density(self, preprocessed, page_num):
         """Detecta tabelas pela densidade e alinhamento de texto"""
         
-        # Aplicar threshold adaptativo para destacar texto
-        adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                       cv2.THRESH_BINARY_INV, 15, 10)
+        # Threshold adaptativo (pré-calculado) para destacar texto
+        adaptive = preprocessed['adaptive_binary']
         
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_03_adaptive.png"), adaptive)
+        self.save_debug_image(f"p{page_num}_03_adaptive.png", adaptive)
         
         # Aplicar operação de fechamento para conectar caracteres
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 1))
         connected_text = cv2.morphologyEx(adaptive, cv2.MORPH_CLOSE, kernel)
         
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_03_connected.png"), connected_text)
+        self.save_debug_image(f"p{page_num}_03_connected.png", connected_text)
         
         # Encontrar contornos de regiões de texto
         contours, _ = cv2.findContours(connected_text, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -160,26 +241,29 @@ class EnhancedTableDetector:
                 text_regions.append((x, y, w, h))
         
         # Agrupar regiões próximas (possíveis tabelas)
-        tables = self.group_text_regions(text_regions, page_num)
+        tables = self.group_text_regions(text_regions, page_num, adaptive.shape)
         
         return tables
     
-    def group_text_regions(self, text_regions, page_num):
+    def group_text_regions(self, text_regions, page_num, image_shape):
         """Agrupa regiões de texto próximas em possíveis tabelas"""
         
         if not text_regions:
             return []
         
-        # Criar grid para análise de densidade
-        img_height, img_width = 3000, 2000  # Estimativa baseada no DPI
+        # Criar grid para análise de densidade, dimensionado pela imagem real
+        img_height, img_width = image_shape[:2]
         grid_size = 100
-        grid = np.zeros((img_height // grid_size, img_width // grid_size))
+        grid_rows = max(1, -(-img_height // grid_size))
+        grid_cols = max(1, -(-img_width // grid_size))
         
-        # Marcar células do grid com texto
-        for x, y, w, h in text_regions:
-            grid_x = min(x // grid_size, grid.shape[1] - 1)
-            grid_y = min(y // grid_size, grid.shape[0] - 1)
-            grid[grid_y, grid_x] += 1
+        # Contar regiões por célula do grid (histograma 2D via bincount)
+        regions = np.asarray(text_regions, dtype=np.int64).reshape(-1, 4)
+        grid_x = np.minimum(regions[:, 0] // grid_size, grid_cols - 1)
+        grid_y = np.minimum(regions[:, 1] // grid_size, grid_rows - 1)
+        grid = np.bincount(
+            grid_y * grid_cols + grid_x, minlength=grid_rows * grid_cols
+        ).reshape(grid_rows, grid_cols).astype(np.float64)
         
         # Encontrar regiões de alta densidade
         threshold = np.percentile(grid[grid > 0], 75)  # 75% das regiões com texto
@@ -208,13 +292,13 @@ class EnhancedTableDetector:
         
         return tables
     
-    def detect_regular_patterns(self, gray, page_num):
+    def detect_regular_patterns(self, preprocessed, page_num):
         """Detecta padrões regulares que indicam estrutura tabular"""
         
-        # Aplicar filtro de detecção de bordas mais sensível
-        edges = cv2.Canny(gray, 30, 100, apertureSize=3)
+        # Filtro de detecção de bordas mais sensível (pré-calculado)
+        edges = preprocessed['edges']
         
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_04_edges.png"), edges)
+        self.save_debug_image(f"p{page_num}_04_edges.png", edges)
         
         # Detectar linhas usando Transform de Hough
         lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=50, 
@@ -236,8 +320,8 @@ class EnhancedTableDetector:
             elif 80 < abs(angle) < 100:  # Linha vertical
                 vertical_lines.append(line[0])
         
-        # Criar imagem com linhas
-        line_img = np.zeros_like(gray)
+        # Criar imagem com linhas (liga as intersecções da mesma tabela)
+        line_img = np.zeros_like(edges)
         
         for x1, y1, x2, y2 in horizontal_lines:
             cv2.line(line_img, (x1, y1), (x2, y2), 255, 2)
@@ -245,101 +329,168 @@ class EnhancedTableDetector:
         for x1, y1, x2, y2 in vertical_lines:
             cv2.line(line_img, (x1, y1), (x2, y2), 255, 2)
         
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_04_detected_lines.png"), line_img)
+        self.save_debug_image(f"p{page_num}_04_detected_lines.png", line_img)
         
         # Encontrar intersecções de linhas (possíveis cantos de tabelas)
         intersections = self.find_line_intersections(horizontal_lines, vertical_lines)
         
         # Agrupar intersecções em retângulos (tabelas)
-        tables = self.group_intersections_to_tables(intersections, page_num)
+        tables = self.group_intersections_to_tables(intersections, page_num, line_mask=line_img)
         
         return tables
     
     def find_line_intersections(self, h_lines, v_lines):
         """Encontra intersecções entre linhas horizontais e verticais"""
-        intersections = []
+        if len(h_lines) == 0 or len(v_lines) == 0:
+            return []
         
-        for hx1, hy1, hx2, hy2 in h_lines:
-            for vx1, vy1, vx2, vy2 in v_lines:
-                # Verificar se as linhas se cruzam
-                h_min_x, h_max_x = min(hx1, hx2), max(hx1, hx2)
-                v_min_y, v_max_y = min(vy1, vy2), max(vy1, vy2)
-                
-                # Coordenadas da intersecção
-                x = (vx1 + vx2) // 2  # Centro da linha vertical
-                y = (hy1 + hy2) // 2  # Centro da linha horizontal
-                
-                # Verificar se está dentro dos limites
-                if h_min_x <= x <= h_max_x and v_min_y <= y <= v_max_y:
-                    intersections.append((x, y))
+        h = np.asarray(h_lines, dtype=np.int64).reshape(-1, 4)
+        v = np.asarray(v_lines, dtype=np.int64).reshape(-1, 4)
+        
+        # Limites de cada segmento
+        h_min_x = np.minimum(h[:, 0], h[:, 2])[:, None]
+        h_max_x = np.maximum(h[:, 0], h[:, 2])[:, None]
+        v_min_y = np.minimum(v[:, 1], v[:, 3])[None, :]
+        v_max_y = np.maximum(v[:, 1], v[:, 3])[None, :]
+        
+        # Coordenadas da intersecção candidata
+        x = ((v[:, 0] + v[:, 2]) // 2)[None, :]  # Centro da linha vertical
+        y = ((h[:, 1] + h[:, 3]) // 2)[:, None]  # Centro da linha horizontal
+        
+        # Matriz H x V: verificar se o ponto está dentro dos dois segmentos
+        crosses = (h_min_x <= x) & (x <= h_max_x) & (v_min_y <= y) & (y <= v_max_y)
+        
+        h_idx, v_idx = np.nonzero(crosses)
+        xs = x[0, v_idx].tolist()
+        ys = y[h_idx, 0].tolist()
         
-        return intersections
+        return list(zip(xs, ys))
     
-    def group_intersections_to_tables(self, intersections, page_num):
-        """Agrupa intersecções próximas em retângulos de tabelas"""
+    def group_intersections_to_tables(self, intersections, page_num, tolerance=20, line_mask=None):
+        """Agrupa intersecções em retângulos de tabelas via grade de ocupação
+        
+        As intersecções são ajustadas a linhas e colunas agrupadas (tolerância
+        de ``tolerance`` px). Cada linha da grade é ligada à próxima linha que
+        compartilha ao menos duas colunas, marcando o retângulo entre elas; os
+        componentes conexos das células marcadas são as regiões de tabela.
+        Com ``line_mask`` (réguas desenhadas) só são ligadas colunas unidas por
+        réguas de verdade, então tabelas vizinhas com cantos alinhados não se
+        fundem. Substitui a busca O(n⁴) por quádruplas de pontos.
+        """
         if len(intersections) < 4:
             return []
         
-        # Ordenar intersecções por posição
-        intersections.sort(key=lambda p: (p[1], p[0]))  # Por Y depois por X
+        points = np.asarray(intersections, dtype=np.float64).reshape(-1, 2)
         
-        tables = []
+        # Ajustar intersecções às linhas/colunas agrupadas
+        col_centers, col_idx = self.cluster_coordinates(points[:, 0], tolerance)
+        row_centers, row_idx = self.cluster_coordinates(points[:, 1], tolerance)
         
-        # Tentar formar retângulos com 4 pontos
-        for i in range(len(intersections)):
-            for j in range(i + 1, len(intersections)):
-                for k in range(j + 1, len(intersections)):
-                    for l in range(k + 1, len(intersections)):
-                        
-                        points = [intersections[i], intersections[j], 
-                                intersections[k], intersections[l]]
-                        
-                        # Verificar se formam um retângulo aproximado
-                        rect = self.check_rectangle_formation(points)
-                        if rect:
-                            x, y, w, h = rect
-                            if w > 100 and h > 50:  # Tamanho mínimo
-                                tables.append((x, y, w, h, 'intersections'))
+        if len(col_centers) < 2 or len(row_centers) < 2:
+            return []
         
-        return tables
-    
-    def check_rectangle_formation(self, points):
-        """Verifica se 4 pontos formam aproximadamente um retângulo"""
-        if len(points) != 4:
-            return None
+        # Grade de ocupação (linha x coluna)
+        occupancy = np.zeros((len(row_centers), len(col_centers)), dtype=bool)
+        occupancy[row_idx, col_idx] = True
         
-        # Ordenar pontos
-        points.sort(key=lambda p: (p[1], p[0]))
+        # Células cobertas por algum retângulo de 4 cantos
+        covered = np.zeros((len(row_centers) - 1, len(col_centers) - 1), dtype=np.uint8)
         
-        # Verificar se formam um padrão retangular
-        top_left, top_right = sorted(points[:2], key=lambda p: p[0])
-        bottom_left, bottom_right = sorted(points[2:], key=lambda p: p[0])
+        for top in range(len(row_centers) - 1):
+            if occupancy[top].sum() < 2:
+                continue
+            
+            # Próxima linha que compartilha pelo menos 2 colunas com a atual
+            shared = occupancy[top] & occupancy[top + 1:]
+            has_pair = shared.sum(axis=1) >= 2
+            if not has_pair.any():
+                continue
+            
+            offset = int(np.argmax(has_pair))
+            bottom = top + 1 + offset
+            shared_cols = np.flatnonzero(shared[offset])
+            
+            for run in self.linked_column_runs(shared_cols, row_centers[top], row_centers[bottom],
+                                               col_centers, line_mask, tolerance):
+                covered[top:bottom, run[0]:run[-1]] = 1
         
-        # Verificar alinhamento
-        tolerance = 20
+        if not covered.any():
+            return []
         
-        # Verificar se as bordas são aproximadamente alinhadas
-        if (abs(top_left[0] - bottom_left[0]) < tolerance and
-            abs(top_right[0] - bottom_right[0]) < tolerance and
-            abs(top_left[1] - top_right[1]) < tolerance and
-            abs(bottom_left[1] - bottom_right[1]) < tolerance):
+        # Regiões retangulares máximas = componentes conexos de células cobertas
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(covered, connectivity=4)
+        
+        tables = []
+        for label in range(1, num_labels):
+            c0 = stats[label, cv2.CC_STAT_LEFT]
+            r0 = stats[label, cv2.CC_STAT_TOP]
+            c1 = c0 + stats[label, cv2.CC_STAT_WIDTH]
+            r1 = r0 + stats[label, cv2.CC_STAT_HEIGHT]
             
-            x = min(top_left[0], bottom_left[0])
-            y = min(top_left[1], top_right[1])
-            w = max(top_right[0], bottom_right[0]) - x
-            h = max(bottom_left[1], bottom_right[1]) - y
+            x = int(round(col_centers[c0]))
+            y = int(round(row_centers[r0]))
+            w = int(round(col_centers[c1])) - x
+            h = int(round(row_centers[r1])) - y
             
-            return (x, y, w, h)
+            if w > 100 and h > 50:  # Tamanho mínimo
+                tables.append((x, y, w, h, 'intersections'))
         
-        return None
+        return tables
     
-    def detect_by_spacing_analysis(self, gray, page_num):
+    def linked_column_runs(self, cols, y_top, y_bottom, col_centers, line_mask, tolerance, min_ink=0.8):
+        """Divide as colunas compartilhadas por duas linhas da grade em trechos ligados
+        
+        Uma coluna conta se há régua vertical entre as duas linhas; colunas
+        seguidas ficam no mesmo trecho se a régua horizontal de cima as une.
+        Sem ``line_mask`` todas as colunas formam um único trecho.
+        """
+        if line_mask is None:
+            return [cols]
+        
+        band = max(1, tolerance // 2)
+        y_top, y_bottom = int(round(y_top)), int(round(y_bottom))
+        
+        runs = []
+        for col in cols:
+            x = int(round(col_centers[col]))
+            vertical = line_mask[y_top:y_bottom + 1, max(0, x - band):x + band + 1].any(axis=1)
+            if not vertical.size or vertical.mean() < min_ink:
+                continue
+            
+            if runs:
+                x_prev = int(round(col_centers[runs[-1][-1]]))
+                horizontal = line_mask[max(0, y_top - band):y_top + band + 1, x_prev:x + 1].any(axis=0)
+                if horizontal.size and horizontal.mean() >= min_ink:
+                    runs[-1].append(col)
+                    continue
+            runs.append([col])
+        
+        return [run for run in runs if len(run) >= 2]
+    
+    def cluster_coordinates(self, values, tolerance):
+        """Agrupa coordenadas 1D próximas; retorna (centros, índice do grupo de cada valor)"""
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        
+        # Novo grupo sempre que o salto entre valores consecutivos excede a tolerância
+        group_of_sorted = np.concatenate(([0], np.cumsum(np.diff(sorted_values) > tolerance)))
+        
+        counts = np.bincount(group_of_sorted)
+        centers = np.bincount(group_of_sorted, weights=sorted_values) / counts
+        
+        labels = np.empty(len(values), dtype=np.intp)
+        labels[order] = group_of_sorted
+        
+        return centers, labels
+    
+    def detect_by_spacing_analysis(self, preprocessed, page_num):
         """Detecta tabelas pela análise de espaçamento regular"""
         
-        # Aplicar threshold para binarizar
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        # Imagem binarizada (Otsu, pré-calculada)
+        binary = preprocessed['otsu_binary']
         
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_05_binary.png"), binary)
+        self.save_debug_image(f"p{page_num}_05_binary.png", binary)
         
         # Analisar projeções horizontais e verticais
         h_projection = np.sum(binary, axis=1)  # Soma por linha
@@ -349,48 +500,92 @@ class EnhancedTableDetector:
         h_peaks = self.find_regular_spacing(h_projection, min_distance=20)
         v_peaks = self.find_regular_spacing(v_projection, min_distance=30)
         
-        # Formar retângulos baseados em picos regulares
-        tables = []
-        for i in range(len(h_peaks) - 1):
-            for j in range(len(v_peaks) - 1):
-                y1, y2 = h_peaks[i], h_peaks[i + 1]
-                x1, x2 = v_peaks[j], v_peaks[j + 1]
-                
+        # Agrupar picos regulares em faixas contíguas (linhas e colunas de tabela)
+        h_bands = self.find_spacing_bands(h_peaks)
+        v_bands = self.find_spacing_bands(v_peaks)
+        
+        # Um candidato por intersecção de faixas (não por célula entre picos)
+        candidates = []
+        for y1, y2, h_count in h_bands:
+            for x1, x2, v_count in v_bands:
                 w = x2 - x1
                 h = y2 - y1
                 
-                if w > 150 and h > 80:  # Tamanho mínimo para tabela
-                    tables.append((x1, y1, w, h, 'spacing'))
+                if w <= 150 or h <= 80:  # Tamanho mínimo para tabela
+                    continue
+                
+                # Descartar intersecções praticamente vazias
+                ink = np.count_nonzero(binary[y1:y2, x1:x2]) / float(w * h)
+                if ink < 0.01:
+                    continue
+                
+                candidates.append((h_count * v_count, (x1, y1, w, h, 'spacing')))
         
-        return tables
+        # Manter apenas as intersecções mais fortes (limite por página)
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [table for _, table in candidates[:self.max_spacing_candidates]]
+    
+    def find_spacing_bands(self, peaks, min_peaks=3, gap_factor=2.5, max_variation=0.5):
+        """Agrupa picos com espaçamento regular em faixas contíguas
+        
+        Uma faixa termina onde o intervalo entre picos passa de ``gap_factor``
+        vezes a mediana dos intervalos. Faixas com menos de ``min_peaks`` picos
+        ou espaçamento irregular (coeficiente de variação acima de
+        ``max_variation``) são descartadas.
+        
+        Retorna lista de (inicio, fim, numero_de_picos).
+        """
+        peaks = np.asarray(peaks, dtype=np.int64)
+        if len(peaks) < min_peaks:
+            return []
+        
+        gaps = np.diff(peaks)
+        breaks = np.flatnonzero(gaps > gap_factor * np.median(gaps)) + 1
+        
+        bands = []
+        for run in np.split(peaks, breaks):
+            if len(run) < min_peaks:
+                continue
+            
+            run_gaps = np.diff(run)
+            if np.std(run_gaps) > max_variation * np.mean(run_gaps):
+                continue
+            
+            bands.append((int(run[0]), int(run[-1]), len(run)))
+        
+        return bands
     
     def find_regular_spacing(self, projection, min_distance=30):
         """Encontra picos com espaçamento regular em uma projeção"""
         
-        # Encontrar picos na projeção
-        mean_val = np.mean(projection)
-        peaks = []
+        projection = np.asarray(projection)
+        if len(projection) < 3:
+            return []
         
-        for i in range(1, len(projection) - 1):
-            if (projection[i] > projection[i-1] and 
-                projection[i] > projection[i+1] and
-                projection[i] > mean_val):
-                peaks.append(i)
+        # Encontrar picos na projeção (máximos locais estritos acima da média)
+        mean_val = np.mean(projection)
+        center = projection[1:-1]
+        is_peak = ((center > projection[:-2]) &
+                   (center > projection[2:]) &
+                   (center > mean_val))
+        peaks = np.flatnonzero(is_peak) + 1
         
-        # Filtrar picos muito próximos
+        # Filtrar picos muito próximos: saltar direto ao próximo pico permitido
         filtered_peaks = []
-        for peak in peaks:
-            if not filtered_peaks or abs(peak - filtered_peaks[-1]) > min_distance:
-                filtered_peaks.append(peak)
+        i = 0
+        while i < len(peaks):
+            peak = int(peaks[i])
+            filtered_peaks.append(peak)
+            i = int(np.searchsorted(peaks, peak + min_distance, side='right'))
         
         return filtered_peaks
     
-    def detect_by_region_segmentation(self, gray, page_num):
+    def detect_by_region_segmentation(self, preprocessed, page_num):
         """Detecta tabelas por segmentação de regiões uniformes"""
         
         # Aplicar segmentação por watershed
-        # Primeiro, encontrar marcadores
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        # Primeiro, encontrar marcadores (binarização Otsu pré-calculada)
+        thresh = preprocessed['otsu_binary']
         
         # Ruído reduction
         kernel = np.ones((3,3), np.uint8)
@@ -407,7 +602,7 @@ class EnhancedTableDetector:
         sure_fg = np.uint8(sure_fg)
         unknown = cv2.subtract(sure_bg, sure_fg)
         
-        cv2.imwrite(os.path.join(self.output_dir, f"p{page_num}_06_watershed_prep.png"), unknown)
+        self.save_debug_image(f"p{page_num}_06_watershed_prep.png", unknown)
         
         # Encontrar componentes conectados
         contours, _ = cv2.findContours(sure_fg, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -422,54 +617,103 @@ class EnhancedTableDetector:
         
         return tables
     
-    def smart_consolidation(self, all_tables, img, page_num):
-        """Consolidação inteligente de todas as detecções"""
+    def smart_consolidation(self, all_tables, img, page_num, iou_threshold=0.5, gray=None):
+        """Consolidação inteligente de todas as detecções
+        
+        Ordem barata-primeiro: filtros geométricos, NMS vetorizado ordenado
+        pela densidade de bordas (O(1) por caixa) e só então a confiança
+        completa, calculada apenas para as caixas sobreviventes.
+        """
         
         if not all_tables:
             return []
         
         print(f"      🔗 Consolidando {len(all_tables)} detecções...")
         
-        # Remover duplicatas por sobreposição
-        consolidated = []
+        boxes = np.array([table[:4] for table in all_tables], dtype=np.float64).reshape(-1, 4)
+        widths, heights = boxes[:, 2], boxes[:, 3]
         
-        for table in all_tables:
+        # 1. Filtros geométricos (tamanho mínimo e proporção razoável)
+        valid = (widths > 80) & (heights > 40)
+        ratios = np.divide(heights, widths, out=np.zeros_like(heights), where=valid)
+        valid &= (ratios > 0.1) & (ratios < 10)
+        
+        candidate_idx = np.flatnonzero(valid)
+        if len(candidate_idx) == 0:
+            return []
+        
+        # Mapas integrais da página, calculados uma única vez
+        if gray is None:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        confidence_maps = self.build_confidence_maps(gray)
+        
+        # 2. NMS vetorizado (remover duplicatas com IoU > limiar)
+        ranking = self.edge_density_scores(confidence_maps, boxes[candidate_idx])
+        kept = self.non_maximum_suppression(boxes[candidate_idx], ranking, iou_threshold)
+        
+        # 3. Confiança completa apenas para as sobreviventes
+        final_tables = []
+        for idx in candidate_idx[kept]:
+            table = all_tables[idx]
             x, y, w, h = table[:4]
             method = table[4] if len(table) > 4 else 'unknown'
             
-            # Verificar sobreposição com tabelas já consolidadas
-            is_duplicate = False
-            for existing in consolidated:
-                ex, ey, ew, eh = existing[:4]
-                
-                # Calcular IoU (Intersection over Union)
-                iou = self.calculate_iou((x, y, w, h), (ex, ey, ew, eh))
-                
-                if iou > 0.5:  # 50% de sobreposição
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                # Adicionar informações extras
-                confidence = self.calculate_table_confidence(img, x, y, w, h)
-                consolidated.append((x, y, w, h, method, confidence))
+            confidence = self.calculate_table_confidence(confidence_maps, x, y, w, h)
+            if confidence > 0.3:  # Confiança mínima
+                final_tables.append((x, y, w, h, method, confidence))
         
         # Ordenar por confiança
-        consolidated.sort(key=lambda t: t[5], reverse=True)
+        final_tables.sort(key=lambda t: t[5], reverse=True)
         
-        # Filtrar por qualidade
-        final_tables = []
-        for table in consolidated:
-            x, y, w, h, method, confidence = table
+        return final_tables
+    
+    def non_maximum_suppression(self, boxes, scores, iou_threshold=0.5):
+        """NMS guloso: mantém a caixa de maior score e descarta as sobrepostas
+        
+        ``boxes`` é um array (N, 4) em formato (x, y, w, h). Retorna os índices
+        mantidos, em ordem decrescente de score.
+        """
+        x1 = boxes[:, 0]
+        y1 = boxes[:, 1]
+        x2 = x1 + boxes[:, 2]
+        y2 = y1 + boxes[:, 3]
+        areas = boxes[:, 2] * boxes[:, 3]
+        
+        order = np.argsort(-np.asarray(scores), kind='stable')
+        kept = []
+        
+        while len(order) > 0:
+            best = order[0]
+            kept.append(best)
+            rest = order[1:]
             
-            # Filtros de qualidade
-            if (w > 80 and h > 40 and  # Tamanho mínimo
-                confidence > 0.3 and    # Confiança mínima
-                0.1 < h/w < 10):       # Proporção razoável
-                
-                final_tables.append((x, y, w, h, method, confidence))
+            # IoU da melhor caixa contra todas as restantes de uma vez
+            inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+            inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+            inter_area = inter_w * inter_h
+            union_area = areas[best] + areas[rest] - inter_area
+            iou = np.divide(inter_area, union_area, out=np.zeros_like(inter_area), where=union_area > 0)
+            
+            order = rest[iou <= iou_threshold]
         
-        return final_tables
+        return np.array(kept, dtype=np.intp)
+    
+    def edge_density_scores(self, confidence_maps, boxes):
+        """Densidade de bordas de várias caixas (x, y, w, h) via imagem integral"""
+        img_height, img_width = confidence_maps['shape']
+        edge_integral = confidence_maps['edge_integral']
+        
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        x0 = np.clip(boxes[:, 0], 0, img_width)
+        y0 = np.clip(boxes[:, 1], 0, img_height)
+        x1 = np.clip(boxes[:, 0] + boxes[:, 2], 0, img_width)
+        y1 = np.clip(boxes[:, 1] + boxes[:, 3], 0, img_height)
+        
+        edge_count = (edge_integral[y1, x1] - edge_integral[y0, x1] -
+                      edge_integral[y1, x0] + edge_integral[y0, x0]).astype(np.float64)
+        area = ((x1 - x0) * (y1 - y0)).astype(np.float64)
+        
+        return np.divide(edge_count, area, out=np.zeros_like(edge_count), where=area > 0)
     
     def calculate_iou(self, box1, box2):
         """Calcula Intersection over Union entre duas caixas"""
@@ -493,27 +737,57 @@ class EnhancedTableDetector:
         
         return inter_area / union_area if union_area > 0 else 0.0
     
-    def calculate_table_confidence(self, img, x, y, w, h):
+    def build_confidence_maps(self, gray):
+        """Pré-calcula imagens integrais da página para pontuar candidatos
+        
+        - ``edge_integral``: imagem integral do mapa de bordas (Canny), para a
+          densidade de bordas de qualquer retângulo em O(1)
+        - ``row_prefix`` / ``col_prefix``: somas acumuladas do cinza ao longo
+          de x e de y, para as projeções de um retângulo sem recortar a ROI
+        """
+        height, width = gray.shape
+        
+        edges = cv2.Canny(gray, 50, 150)
+        edge_integral = cv2.integral((edges > 0).astype(np.uint8))
+        
+        row_prefix = np.zeros((height, width + 1), dtype=np.int32)
+        np.cumsum(gray, axis=1, dtype=np.int32, out=row_prefix[:, 1:])
+        
+        col_prefix = np.zeros((height + 1, width), dtype=np.int32)
+        np.cumsum(gray, axis=0, dtype=np.int32, out=col_prefix[1:, :])
+        
+        return {
+            'shape': (height, width),
+            'edge_integral': edge_integral,
+            'row_prefix': row_prefix,
+            'col_prefix': col_prefix
+        }
+    
+    def calculate_table_confidence(self, confidence_maps, x, y, w, h):
         """Calcula confiança de que uma região é realmente uma tabela"""
         
-        # Extrair região
-        roi = img[y:y+h, x:x+w]
-        if roi.size == 0:
+        # Limitar região à imagem
+        img_height, img_width = confidence_maps['shape']
+        x0, x1 = min(max(x, 0), img_width), min(max(x + w, 0), img_width)
+        y0, y1 = min(max(y, 0), img_height), min(max(y + h, 0), img_height)
+        if x1 <= x0 or y1 <= y0:
             return 0.0
         
-        gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-        
         # Fatores de confiança
         confidence_factors = []
         
-        # 1. Densidade de bordas
-        edges = cv2.Canny(gray_roi, 50, 150)
-        edge_density = np.sum(edges > 0) / edges.size
+        # 1. Densidade de bordas (consulta O(1) na imagem integral)
+        edge_integral = confidence_maps['edge_integral']
+        edge_count = (edge_integral[y1, x1] - edge_integral[y0, x1] -
+                      edge_integral[y1, x0] + edge_integral[y0, x0])
+        edge_density = edge_count / ((x1 - x0) * (y1 - y0))
         confidence_factors.append(min(edge_density * 10, 1.0))
         
         # 2. Regularidade de padrões
-        h_projection = np.sum(gray_roi, axis=1)
-        v_projection = np.sum(gray_roi, axis=0)
+        row_prefix = confidence_maps['row_prefix']
+        col_prefix = confidence_maps['col_prefix']
+        h_projection = row_prefix[y0:y1, x1] - row_prefix[y0:y1, x0]
+        v_projection = col_prefix[y1, x0:x1] - col_prefix[y0, x0:x1]
         
         h_std = np.std(h_projection) / (np.mean(h_projection) + 1)
         v_std = np.std(v_projection) / (np.mean(v_projection) + 1)
@@ -527,7 +801,7 @@ class EnhancedTableDetector:
         confidence_factors.append(aspect_confidence)
         
         # 4. Tamanho relativo
-        total_area = img.shape[0] * img.shape[1]
+        total_area = img_height * img_width
         relative_size = (w * h) / total_area
         size_confidence = min(relative_size * 50, 1.0)  # Penalizar tabelas muito pequenas
         confidence_factors.append(size_confidence)
@@ -569,39 +843,186 @@ class EnhancedTableDetector:
                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
         
         # Salvar resultado
-        output_path = os.path.join(self.output_dir, f"p{page_num}_FINAL_result.png")
-        cv2.imwrite(output_path, result_img)
+        name = f"p{page_num}_FINAL_result.png"
+        self.save_debug_image(name, result_img)
         
-        return output_path
+        return os.path.join(self.output_dir, name)
+    
+
+
+class EnhancedTableDetector(QThread, EnhancedTableEngine):
+    """Detector aprimorado para tabelas complexas e sutis"""
+    
+    progress_updated = pyqtSignal(int, str)
+    tables_detected = pyqtSignal(list)
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, pdf_path, pages="all", zoom=3.0, debug=False, output_dir=None, max_workers=None):
+        # QThread repassa os argumentos nomeados ao __init__ do EnhancedTableEngine
+        super().__init__(pdf_path=pdf_path, zoom=zoom, debug=debug, output_dir=output_dir)
+        self.pages = pages
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.should_stop = False
+    
+    def worker_config(self):
+        """Parâmetros para recriar o analisador em um processo worker"""
+        return {
+            'pdf_path': self.pdf_path,
+            'zoom': self.zoom,
+            'debug': self.debug,
+            'output_dir': self.output_dir
+        }
+    
+    def iter_detect_pages(self, page_numbers):
+        """Detecta tabelas nas páginas (1-based), entregando na ordem de conclusão
+        
+        Com ``max_workers > 1`` as páginas são distribuídas em processos, cada
+        um com seu próprio documento (PyMuPDF não é seguro entre threads).
+        """
+        if self.max_workers <= 1 or len(page_numbers) <= 1:
+            try:
+                for page_num in page_numbers:
+                    if self.should_stop:
+                        break
+                    yield self.detect_page(page_num)
+            finally:
+                self.close()
+            return
+        
+        # spawn: processos limpos (sem herdar threads/estado Qt do pai), como no Windows
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(page_numbers)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_page_worker,
+            initargs=(self.worker_config(),)
+        )
+        try:
+            futures = [executor.submit(_detect_page_worker, page_num) for page_num in page_numbers]
+            for future in as_completed(futures):
+                if self.should_stop:
+                    break
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def to_detection_schema(self, page_result):
+        """Converte o resultado de uma página para o formato comum dos detectores"""
+        page_width, page_height = page_result['page_size']
+        img_height, img_width = page_result['image_size'][:2]
+        scale_x = page_width / img_width
+        scale_y = page_height / img_height
+        
+        detected = []
+        for i, (x, y, w, h, method, confidence) in enumerate(page_result['tables']):
+            # Converter bbox de pixels para coordenadas PDF
+            x_pdf = max(0, x * scale_x)
+            y_pdf = max(0, y * scale_y)
+            w_pdf = min(page_width - x_pdf, w * scale_x)
+            h_pdf = min(page_height - y_pdf, h * scale_y)
+            
+            detected.append({
+                'page': page_result['page'],
+                'table_index': i,
+                'bbox': (x_pdf, y_pdf, w_pdf, h_pdf),
+                'area': w_pdf * h_pdf,
+                'aspect_ratio': w_pdf / h_pdf if h_pdf > 0 else 0.0,
+                'pixel_bbox': (x, y, w, h),
+                'detection_method': f'enhanced_opencv_{method}',
+                'confidence': confidence,
+                'validation_passed': True,
+                'coordinates_converted': True
+            })
+        
+        return detected
+    
+    def run(self):
+        """Executa a detecção aprimorada"""
+        try:
+            self.progress_updated.emit(5, "Abrindo PDF...")
+            
+            doc = fitz.open(self.pdf_path)
+            total_pages = len(doc)
+            doc.close()
+            
+            if self.pages == "all":
+                pages_to_process = list(range(total_pages))
+            else:
+                pages_to_process = self.parse_page_range(self.pages, total_pages)
+            
+            page_numbers = [page_idx + 1 for page_idx in pages_to_process]
+            detected_tables = []
+            
+            self.progress_updated.emit(
+                10, f"Analisando {len(page_numbers)} página(s) com {self.max_workers} worker(s)..."
+            )
+            
+            for done, page_result in enumerate(self.iter_detect_pages(page_numbers), 1):
+                detected_tables.extend(self.to_detection_schema(page_result))
+                
+                progress = 10 + int((done / len(page_numbers)) * 85)
+                self.progress_updated.emit(
+                    progress, f"Página {page_result['page']} concluída ({done}/{len(page_numbers)})"
+                )
+            
+            detected_tables.sort(key=lambda t: (t['page'], t['table_index']))
+            
+            self.progress_updated.emit(100, f"Detecção concluída! {len(detected_tables)} tabelas encontradas")
+            self.tables_detected.emit(detected_tables)
+            
+        except Exception as e:
+            self.error_occurred.emit(f"Erro na detecção OpenCV aprimorada: {str(e)}")
+    
+    def parse_page_range(self, page_str, total_pages):
+        """Converte string de páginas em lista de índices"""
+        pages = []
+        parts = page_str.split(',')
+        
+        for part in parts:
+            part = part.strip()
+            if '-' in part:
+                start, end = map(int, part.split('-'))
+                pages.extend(range(start - 1, min(end, total_pages)))
+            else:
+                page_num = int(part) - 1
+                if 0 <= page_num < total_pages:
+                    pages.append(page_num)
+        
+        return sorted(list(set(pages)))
+    
+    def stop(self):
+        """Para a detecção"""
+        self.should_stop = True
     
     def analyze_all_pages(self):
-        """Analisa todas as páginas com detector aprimorado"""
+        """Analisa as páginas selecionadas com detector aprimorado (modo linha de comando)"""
         
         print("🔍 DETECTOR OPENCV APRIMORADO - ANÁLISE COMPLETA")
         print("=" * 70)
         
+        doc = fitz.open(self.pdf_path)
+        total_pages = len(doc)
+        doc.close()
+        
+        if self.pages == "all":
+            page_numbers = list(range(1, total_pages + 1))
+        else:
+            page_numbers = [page_idx + 1 for page_idx in self.parse_page_range(self.pages, total_pages)]
+        
+        os.makedirs(self.output_dir, exist_ok=True)
         all_results = {}
         
-        for page_num in self.target_pages:
-            print(f"\n📄 PÁGINA {page_num}:")
-            print("-" * 50)
-            
-            # Carregar imagem em alta resolução
-            img = self.load_page_as_image(page_num, dpi=3.0)
-            
-            if img is None:
-                print(f"   ❌ Erro ao carregar página {page_num}")
-                continue
-            
-            # Detectar tabelas
-            tables = self.detect_subtle_tables(img, page_num)
+        for page_result in self.iter_detect_pages(page_numbers):
+            page_num = page_result['page']
+            print(f"\n📄 PÁGINA {page_num}: concluída")
             
             all_results[page_num] = {
-                'total_tables': len(tables),
-                'tables': tables,
-                'image_size': img.shape
+                'total_tables': len(page_result['tables']),
+                'tables': page_result['tables'],
+                'image_size': page_result['image_size']
             }
         
+        all_results = dict(sorted(all_results.items()))
+        
         # Salvar resultados
         self.save_enhanced_results(all_results)
         
@@ -669,7 +1090,7 @@ class EnhancedTableDetector:
                 print(f"   T{i+1}: {w}×{h}px | {method} | {confidence:.2f}")
         
         print(f"\n🎯 RESUMO GERAL:")
-        print(f"   📚 Páginas: {len(self.target_pages)}")
+        print(f"   📚 Páginas: {len(results)}")
         print(f"   📊 Total de tabelas: {total_tables}")
         
         print(f"\n📈 POR MÉTODO:")
@@ -683,7 +1104,7 @@ class EnhancedTableDetector:
             print(f"   📁 Resultados em: {self.output_dir}")
         
         return {
-            'total_pages': len(self.target_pages),
+            'total_pages': len(results),
             'total_tables': total_tables,
             'method_distribution': method_counts,
             'avg_confidence': np.mean(confidence_stats) if confidence_stats else 0,
@@ -691,8 +1112,17 @@ class EnhancedTableDetector:
         }
 
 def main():
-    """Função principal"""
-    detector = EnhancedTableDetector()
+    """Função principal: enhanced_opencv_detector.py <pdf> [páginas] [--no-debug]"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not args:
+        print("Uso: python enhanced_opencv_detector.py <arquivo.pdf> [páginas, ex.: 1-5,8] [--no-debug]")
+        sys.exit(1)
+    
+    detector = EnhancedTableDetector(
+        args[0],
+        pages=args[1] if len(args) > 1 else "all",
+        debug="--no-debug" not in sys.argv
+    )
     detector.analyze_all_pages()
 
 if __name__ == "__main__":
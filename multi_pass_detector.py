@@ -76,9 +76,9 @@ class MultiPassTableDetector(QThread):
                     f"Passada {pass_num}: Regiões extraídas pintadas de branco"
                 )
             
-            # Exportar PDF final com regiões pintadas ANTES de remover
-            if working_pdf_path:
-                self.export_final_pdf_with_painted_regions(working_pdf_path)
+            # Exportar PDF final com regiões marcadas (atualização incremental do original);
+            # sem tabelas, o PDF de auditoria ainda traz a página de sumário
+            self.export_final_pdf_with_painted_regions()
             
             # Limpar arquivo temporário
             if os.path.exists(working_pdf_path) and working_pdf_path != self.pdf_path:
@@ -387,13 +387,14 @@ class MultiPassTableDetector(QThread):
         """Para a detecção"""
         self.should_stop = True
     
-    def export_final_pdf_with_painted_regions(self, working_pdf_path):
-        """Exporta o PDF final com as regiões pintadas e relatório estatístico"""
+    def export_final_pdf_with_painted_regions(self):
+        """Exporta o PDF final com as regiões marcadas e relatório estatístico
+        
+        O PDF de auditoria é uma atualização incremental do original: os bytes
+        do original são copiados sem reescrita e apenas as anotações das
+        páginas afetadas e a página de sumário são anexadas ao final.
+        """
         try:
-            if not os.path.exists(working_pdf_path):
-                print(f"⚠️ PDF de trabalho não encontrado: {working_pdf_path}")
-                return
-            
             # Gerar nome do arquivo de exportação
             from datetime import datetime
             base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
@@ -402,12 +403,31 @@ class MultiPassTableDetector(QThread):
             
             print(f"📄 Exportando PDF final: {export_path}")
             
-            # Copiar o PDF pintado
+            # Copiar bytes do original (cópia de arquivo, sem reescrever o PDF)
             import shutil
-            shutil.copy2(working_pdf_path, export_path)
+            shutil.copyfile(self.pdf_path, export_path)
+            
+            doc = fitz.open(export_path)
+            temp_path = None
+            try:
+                # Marcar regiões extraídas apenas nas páginas afetadas
+                self.annotate_extracted_regions(doc)
+                
+                # Adicionar página de sumário com estatísticas (ao final)
+                self.add_summary_page_to_pdf(doc)
+                
+                # Salvar apenas o incremento (anotações + sumário)
+                if doc.can_save_incrementally():
+                    doc.save(export_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                else:
+                    # PDF reparado na abertura: reescrita completa é inevitável
+                    temp_path = f"{export_path}.tmp"
+                    doc.save(temp_path, garbage=1)
+            finally:
+                doc.close()  # Também em caso de erro (no Windows o arquivo aberto fica travado)
             
-            # Adicionar página de sumário com estatísticas
-            self.add_summary_page_to_pdf(export_path)
+            if temp_path:
+                os.replace(temp_path, export_path)
             
             # Emitir sinal de PDF salvo
             self.final_pdf_saved.emit(export_path)
@@ -417,15 +437,37 @@ class MultiPassTableDetector(QThread):
         except Exception as e:
             print(f"❌ Erro ao exportar PDF: {e}")
     
-    def add_summary_page_to_pdf(self, pdf_path):
-        """Adiciona página de sumário com estatísticas detalhadas"""
+    def annotate_extracted_regions(self, doc):
+        """Cobre as regiões extraídas com anotações brancas identificadas pela passada"""
+        for table in self.all_detected_tables:
+            page_num = table.get('page', 0) - 1  # Converter para índice 0
+            if not 0 <= page_num < len(doc):
+                continue
+            
+            page = doc.load_page(page_num)
+            x, y, w, h = table['bbox'][:4]
+            rect = fitz.Rect(x, y, x + w, y + h) & page.rect
+            if rect.is_empty:
+                continue
+            
+            pass_num = table.get('detection_pass', 1)
+            annot = page.add_freetext_annot(
+                rect,
+                f"[TABELA EXTRAÍDA - PASSADA {pass_num}]",
+                fontsize=8,
+                text_color=(0.5, 0.5, 0.5),
+                fill_color=(1, 1, 1)
+            )
+            annot.set_info(title="pdf-table-scanner", content=table.get('multi_pass_id', ''))
+            annot.update(fontsize=8, text_color=(0.5, 0.5, 0.5), fill_color=(1, 1, 1))
+    
+    def add_summary_page_to_pdf(self, doc):
+        """Adiciona página de sumário com estatísticas detalhadas ao final do documento"""
         try:
             from datetime import datetime
             
-            doc = fitz.open(pdf_path)
-            
-            # Criar página de sumário no início
-            summary_page = doc.new_page(0, width=595, height=842)  # A4
+            # Criar página de sumário no final (mantém a numeração original)
+            summary_page = doc.new_page(-1, width=595, height=842)  # A4
             
             # Configurar texto
             font_size = 12
@@ -513,13 +555,6 @@ class MultiPassTableDetector(QThread):
                 summary_page.insert_text((margin + 20, y), f"• Páginas afetadas: {page_count}", fontsize=font_size-1, color=(0, 0, 0))
                 y += line_height * 1.5
             
-            # Salvar documento atualizado (sem incremental se houver problemas de criptografia)
-            try:
-                doc.save(pdf_path, incremental=True)
-            except:
-                doc.save(pdf_path)
-            doc.close()
-            
         except Exception as e:
             print(f"⚠️ Erro ao adicionar página de sumário: {e}")
 
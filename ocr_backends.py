@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backends de OCR para o TesseractTableDetector
+Motor persistente (tesserocr) com fallback para o pytesseract (um processo por chamada)
+"""
+
+import os
+import tempfile
+
+
+class PytesseractBackend:
+    """OCR via pytesseract: cada chamada executa o binário do tesseract
+    
+    No modo em lote várias imagens vão em uma única execução (lista de
+    arquivos), carregando os dados de idioma uma vez por lote.
+    """
+    
+    name = "pytesseract"
+    
+    def __init__(self, language='por', min_confidence=30):
+        import pytesseract
+        from PIL import Image
+        self.pytesseract = pytesseract
+        self.Image = Image
+        self.language = language
+        self.min_confidence = min_confidence
+        self.config = f'--psm 6 -l {language} -c preserve_interword_spaces=1'
+    
+    def recognize_words(self, image):
+        """Reconhece as palavras de uma imagem RGB (numpy)"""
+        data = self.pytesseract.image_to_data(
+            image, config=self.config, output_type=self.pytesseract.Output.DICT
+        )
+        return [word for _, word in self.indexed_words(data)]
+    
+    def recognize_batch(self, images):
+        """Reconhece várias imagens em uma única execução do tesseract"""
+        if len(images) <= 1:
+            return [self.recognize_words(image) for image in images]
+        
+        with tempfile.TemporaryDirectory(prefix="ocr_lote_") as temp_dir:
+            paths = []
+            for i, image in enumerate(images):
+                path = os.path.join(temp_dir, f"pagina_{i:04d}.png")
+                self.Image.fromarray(image).save(path)
+                paths.append(path)
+            
+            list_path = os.path.join(temp_dir, "imagens.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(paths) + "\n")
+            
+            data = self.pytesseract.image_to_data(
+                list_path, config=self.config, output_type=self.pytesseract.Output.DICT
+            )
+        
+        results = [[] for _ in images]
+        for page_index, word in self.indexed_words(data):
+            if 0 <= page_index < len(results):
+                results[page_index].append(word)
+        return results
+    
+    def indexed_words(self, data):
+        """Converte a saída TSV do tesseract em pares (índice da imagem, palavra)"""
+        indexed_words = []
+        for i, text in enumerate(data['text']):
+            if text.strip() and float(data['conf'][i]) > self.min_confidence:  # Confiança mínima
+                word = {
+                    'text': text.strip(),
+                    'x': data['left'][i],
+                    'y': data['top'][i],
+                    'w': data['width'][i],
+                    'h': data['height'][i],
+                    'conf': data['conf'][i]
+                }
+                indexed_words.append((int(data['page_num'][i]) - 1, word))
+        return indexed_words
+    
+    def close(self):
+        """Nada a liberar (um processo por chamada)"""
+        pass
+
+
+class TesserocrBackend:
+    """OCR com motor Tesseract persistente (tesserocr)
+    
+    O idioma é carregado uma única vez e o mesmo motor atende todas as
+    páginas; o custo por página fica restrito ao reconhecimento.
+    """
+    
+    name = "tesserocr"
+    
+    def __init__(self, language='por', min_confidence=30):
+        import tesserocr
+        from PIL import Image
+        self.tesserocr = tesserocr
+        self.Image = Image
+        self.min_confidence = min_confidence
+        self.api = tesserocr.PyTessBaseAPI(lang=language, psm=tesserocr.PSM.SINGLE_BLOCK)
+        self.api.SetVariable("preserve_interword_spaces", "1")
+    
+    def recognize_words(self, image):
+        """Reconhece as palavras de uma imagem RGB (numpy)"""
+        level = self.tesserocr.RIL.WORD
+        
+        self.api.SetImage(self.Image.fromarray(image))
+        self.api.Recognize()
+        iterator = self.api.GetIterator()
+        if iterator is None:
+            return []
+        
+        words = []
+        for result in self.tesserocr.iterate_level(iterator, level):
+            text = result.GetUTF8Text(level)
+            confidence = result.Confidence(level)
+            if not text or not text.strip() or confidence <= self.min_confidence:
+                continue
+            
+            x1, y1, x2, y2 = result.BoundingBox(level)
+            words.append({
+                'text': text.strip(),
+                'x': x1,
+                'y': y1,
+                'w': x2 - x1,
+                'h': y2 - y1,
+                'conf': confidence
+            })
+        return words
+    
+    def recognize_batch(self, images):
+        """Reconhece várias imagens com o mesmo motor carregado"""
+        return [self.recognize_words(image) for image in images]
+    
+    def close(self):
+        """Libera o motor e os dados de idioma"""
+        self.api.End()
+
+
+def create_ocr_backend(language='por', engine="auto"):
+    """Cria o backend de OCR
+    
+    ``engine`` pode ser "tesserocr", "pytesseract" ou "auto" (motor
+    persistente quando o tesserocr estiver instalado e inicializar). Levanta
+    ImportError se nenhum backend estiver disponível.
+    """
+    if engine in ("auto", "tesserocr"):
+        try:
+            return TesserocrBackend(language)
+        except (ImportError, RuntimeError) as e:
+            # RuntimeError: tesserocr instalado, mas sem tessdata/idioma
+            if engine == "tesserocr":
+                raise
+            if isinstance(e, RuntimeError):
+                print(f"⚠️ tesserocr indisponível ({e}), usando pytesseract")
+    
+    return PytesseractBackend(language)
@@ -11,6 +11,39 @@ import fitz
 from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtGui import QImage
 import os
+import time
+from ocr_backends import create_ocr_backend
+
+
+def count_aligned_anchors(anchors, lines, tolerance=20):
+    """Conta, para cada linha, quantas âncoras de coluna têm uma posição próxima
+    
+    ``anchors`` são as posições X de referência e ``lines`` uma lista de
+    listas de posições X (quantidades diferentes por linha são aceitas). Todas
+    as linhas são resolvidas em uma única busca ordenada: cada linha recebe um
+    deslocamento próprio, as posições são ordenadas uma vez e cada âncora é
+    localizada com ``np.searchsorted``.
+    """
+    anchors = np.asarray(anchors, dtype=np.float64)
+    counts = np.array([len(line) for line in lines], dtype=np.int64)
+    if len(anchors) == 0 or counts.sum() == 0:
+        return np.zeros(len(lines), dtype=np.int64)
+    
+    positions = np.concatenate([np.asarray(line, dtype=np.float64) for line in lines if len(line)])
+    line_ids = np.repeat(np.arange(len(lines)), counts)
+    
+    # Deslocamento maior que qualquer distância válida separa as linhas
+    span = max(positions.max(), anchors.max()) - min(positions.min(), anchors.min())
+    stride = span + 2 * tolerance + 1
+    keys = np.sort(line_ids * stride + positions)
+    
+    queries = (np.arange(len(lines))[:, None] * stride + anchors[None, :]).ravel()
+    idx = np.searchsorted(keys, queries)
+    right = np.abs(keys[np.minimum(idx, len(keys) - 1)] - queries)
+    left = np.abs(keys[np.maximum(idx - 1, 0)] - queries)
+    
+    matched = (np.minimum(left, right) <= tolerance).reshape(len(lines), len(anchors))
+    return matched.sum(axis=1)
 
 
 class OpenCVTableDetector(QThread):
@@ -20,15 +53,20 @@ class OpenCVTableDetector(QThread):
     tables_detected = pyqtSignal(list)  # Lista de regiões de tabelas detectadas
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, pdf_path, pages="all", min_table_area=5000):
+    LINE_KERNEL_LENGTH = 80  # Kernel 80x1 / 1x80 aplicado com iterations=2
+    
+    def __init__(self, pdf_path, pages="all", min_table_area=5000, line_engine="morphology",
+                 max_table_candidates=25):
         super().__init__()
         self.pdf_path = pdf_path
         self.pages = pages
         self.min_table_area = min_table_area
+        self.line_engine = line_engine  # "morphology" ou "runlength"
+        self.max_table_candidates = max_table_candidates  # Limite de candidatos por página
         self.should_stop = False
     
-    def detect_lines(self, image):
-        """Detecta linhas horizontais e verticais na imagem com parâmetros otimizados"""
+    def binarize_for_lines(self, image):
+        """Binarização usada pelos extratores de linhas"""
         # Converter para escala de cinza
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
@@ -36,8 +74,24 @@ class OpenCVTableDetector(QThread):
         gray = cv2.bilateralFilter(gray, 9, 75, 75)
         
         # Threshold adaptivo para lidar com variações de iluminação
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+    
+    def detect_lines(self, image, engine=None):
+        """Detecta linhas horizontais e verticais na imagem com parâmetros otimizados"""
+        binary = self.binarize_for_lines(image)
         
+        if (engine or self.line_engine) == "runlength":
+            horizontal_lines, vertical_lines = self.detect_lines_runlength(binary)
+        else:
+            horizontal_lines, vertical_lines = self.detect_lines_morphology(binary)
+        
+        # Combinar linhas com pesos balanceados
+        table_structure = cv2.addWeighted(horizontal_lines, 0.5, vertical_lines, 0.5, 0.0)
+        
+        return table_structure, horizontal_lines, vertical_lines
+    
+    def detect_lines_morphology(self, binary):
+        """Extrai máscaras de linhas por abertura morfológica"""
         # Detectar linhas horizontais com kernel mais específico
         horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (80, 1))  # Aumentei de 40 para 80
         horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
@@ -46,10 +100,86 @@ class OpenCVTableDetector(QThread):
         vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 80))  # Aumentei de 40 para 80
         vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
         
-        # Combinar linhas com pesos balanceados
-        table_structure = cv2.addWeighted(horizontal_lines, 0.5, vertical_lines, 0.5, 0.0)
+        return horizontal_lines, vertical_lines
+    
+    def detect_lines_runlength(self, binary, min_length=None):
+        """Extrai máscaras de linhas mantendo apenas corridas longas de pixels
         
-        return table_structure, horizontal_lines, vertical_lines
+        Uma abertura com kernel 80x1 e iterations=2 equivale a manter corridas
+        de pelo menos 2*80-1 pixels, que é o limiar padrão aqui.
+        """
+        if min_length is None:
+            min_length = 2 * self.LINE_KERNEL_LENGTH - 1
+        
+        horizontal_lines = np.ascontiguousarray(self.long_runs_mask(binary, min_length))
+        vertical_lines = np.ascontiguousarray(self.long_runs_mask(np.ascontiguousarray(binary.T), min_length).T)
+        
+        return horizontal_lines, vertical_lines
+    
+    def long_runs_mask(self, binary, min_length):
+        """Máscara (0/255) das corridas horizontais com comprimento >= min_length"""
+        rows, cols = binary.shape
+        
+        # Uma coluna zerada em cada lado separa as linhas no vetor achatado
+        padded = np.zeros((rows, cols + 2), dtype=np.int8)
+        padded[:, 1:-1] = binary > 0
+        transitions = np.diff(padded.ravel())
+        
+        # Início e fim (exclusivo) de cada corrida, na mesma ordem
+        starts = np.flatnonzero(transitions == 1) + 1
+        ends = np.flatnonzero(transitions == -1) + 1
+        
+        lengths = ends - starts
+        keep = lengths >= min_length
+        starts, lengths = starts[keep], lengths[keep]
+        
+        # Índices de todos os pixels das corridas longas, sem laço Python
+        mask = np.zeros(padded.size, dtype=np.uint8)
+        if len(starts):
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            mask[np.arange(lengths.sum()) + offsets] = 255
+        
+        return mask.reshape(rows, cols + 2)[:, 1:-1]
+    
+    def extract_line_segments(self, line_mask, horizontal=True):
+        """Converte uma máscara de linhas em segmentos (x1, y1, x2, y2)"""
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(line_mask, connectivity=8)
+        
+        segments = []
+        for x, y, w, h, _ in stats[1:num_labels]:
+            if horizontal:
+                y_mid = int(y + h // 2)
+                segments.append((int(x), y_mid, int(x + w - 1), y_mid))
+            else:
+                x_mid = int(x + w // 2)
+                segments.append((x_mid, int(y), x_mid, int(y + h - 1)))
+        
+        return segments
+    
+    def benchmark_line_engines(self, image, repeats=5):
+        """Compara tempo e concordância entre os extratores de linhas"""
+        binary = self.binarize_for_lines(image)
+        
+        report = {}
+        masks = {}
+        for engine, extractor in (("morphology", self.detect_lines_morphology),
+                                  ("runlength", self.detect_lines_runlength)):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                masks[engine] = extractor(binary)
+            report[f"{engine}_ms"] = (time.perf_counter() - start) * 1000 / repeats
+        
+        # Concordância: IoU das máscaras horizontais e verticais
+        for name, morph_mask, run_mask in zip(("horizontal", "vertical"),
+                                              masks["morphology"], masks["runlength"]):
+            union = np.count_nonzero(morph_mask | run_mask)
+            intersection = np.count_nonzero(morph_mask & run_mask)
+            report[f"{name}_iou"] = float(intersection / union) if union else 1.0
+        
+        report["h_segments"] = len(self.extract_line_segments(masks["runlength"][0], True))
+        report["v_segments"] = len(self.extract_line_segments(masks["runlength"][1], False))
+        
+        return report
     
     def refine_table_bbox(self, image, initial_bbox):
         """Refina o bounding box para enquadrar melhor a tabela real"""
@@ -120,39 +250,29 @@ class OpenCVTableDetector(QThread):
         # Extrair região da tabela
         table_roi = image[y:y+h, x:x+w]
         
-        # Converter para escala de cinza
-        gray_roi = cv2.cvtColor(table_roi, cv2.COLOR_BGR2GRAY)
-        
         # Detectar linhas na região
         _, h_lines, v_lines = self.detect_lines(table_roi)
         
-        # Contar linhas horizontais e verticais significativas
-        h_contours, _ = cv2.findContours(h_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        v_contours, _ = cv2.findContours(v_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Componentes conexos das linhas (mesma conectividade dos contornos externos)
+        _, _, h_stats, _ = cv2.connectedComponentsWithStats(h_lines, connectivity=8)
+        _, _, v_stats, _ = cv2.connectedComponentsWithStats(v_lines, connectivity=8)
         
         # Filtrar linhas por comprimento mínimo (mais permissivo)
         min_h_length = w * 0.2  # Reduzido de 30% para 20%
         min_v_length = h * 0.2  # Reduzido de 30% para 20%
         
-        valid_h_lines = 0
-        for contour in h_contours:
-            x_cont, y_cont, w_cont, h_cont = cv2.boundingRect(contour)
-            if w_cont >= min_h_length and h_cont <= 15:  # Linha fina e longa
-                valid_h_lines += 1
-        
-        valid_v_lines = 0
-        for contour in v_contours:
-            x_cont, y_cont, w_cont, h_cont = cv2.boundingRect(contour)
-            if h_cont >= min_v_length and w_cont <= 15:  # Linha fina e alta
-                valid_v_lines += 1
+        # Linha fina e longa / fina e alta (linha 0 é o fundo)
+        h_widths, h_heights = h_stats[1:, cv2.CC_STAT_WIDTH], h_stats[1:, cv2.CC_STAT_HEIGHT]
+        v_widths, v_heights = v_stats[1:, cv2.CC_STAT_WIDTH], v_stats[1:, cv2.CC_STAT_HEIGHT]
+        valid_h_lines = int(np.count_nonzero((h_widths >= min_h_length) & (h_heights <= 15)))
+        valid_v_lines = int(np.count_nonzero((v_heights >= min_v_length) & (v_widths <= 15)))
         
         # Critérios ultra permissivos para tabelas pequenas
         has_enough_lines = valid_h_lines >= 1 or valid_v_lines >= 1  # Pelo menos 1 linha em qualquer direção
         
         # Verificar densidade de intersecções
         intersections = cv2.bitwise_and(h_lines, v_lines)
-        intersection_points = cv2.findNonZero(intersections)
-        intersection_density = len(intersection_points) if intersection_points is not None else 0
+        intersection_density = cv2.countNonZero(intersections)
         
         # Área mínima e máxima relativa
         image_area = image.shape[0] * image.shape[1]
@@ -251,46 +371,62 @@ class OpenCVTableDetector(QThread):
         if len(lines) < 2:
             return 0.0
         
-        # Obter posições X de cada elemento em cada linha
-        all_x_positions = []
-        for line in lines:
-            x_positions = [region[0] for region in line]  # x position
-            all_x_positions.append(sorted(x_positions))
-        
-        # Verificar consistência entre linhas
-        alignment_scores = []
-        
-        for i in range(1, len(all_x_positions)):
-            line1 = all_x_positions[0]
-            line2 = all_x_positions[i]
-            
-            # Comparar posições (tolerância de 20 pixels)
-            matches = 0
-            for pos1 in line1:
-                for pos2 in line2:
-                    if abs(pos1 - pos2) <= 20:
-                        matches += 1
-                        break
-            
-            if len(line1) > 0:
-                alignment_score = matches / len(line1)
-                alignment_scores.append(alignment_score)
+        # Posições X de cada elemento em cada linha, comparadas com a primeira
+        x_positions = [[region[0] for region in line] for line in lines]
+        reference = x_positions[0]
+        if not reference:
+            return 0.0
         
-        return sum(alignment_scores) / len(alignment_scores) if alignment_scores else 0.0
+        # Comparar posições (tolerância de 20 pixels), todas as linhas de uma vez
+        matches = count_aligned_anchors(reference, x_positions[1:], tolerance=20)
+        return float(np.mean(matches / len(reference)))
 
     def find_table_contours(self, table_structure):
-        """Encontra contornos de tabelas na estrutura detectada com validação inteligente"""
+        """Encontra contornos de tabelas na estrutura detectada com validação inteligente
+        
+        Usa a árvore de contornos (RETR_TREE) em uma única passada: contornos de
+        estrutura em qualquer profundidade são candidatos (tabelas dentro de
+        molduras), e células de tabelas que compartilham uma borda são separadas
+        pela mudança de alinhamento entre os grupos de células.
+        """
         # Dilatar de forma mais conservadora
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
         dilated = cv2.dilate(table_structure, kernel, iterations=1)
         
-        # Encontrar contornos
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Encontrar árvore de contornos
+        contours, hierarchy = cv2.findContours(dilated, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        if hierarchy is None:
+            return []
+        
+        parents = hierarchy[0][:, 3]
+        children = [[] for _ in contours]
+        for i, parent in enumerate(parents):
+            if parent >= 0:
+                children[parent].append(i)
+        
+        # Profundidade na árvore: par = estrutura (linhas), ímpar = furo (célula/moldura)
+        depths = [-1] * len(contours)
+        for i in range(len(contours)):
+            chain = []
+            node = i
+            while node >= 0 and depths[node] < 0:
+                chain.append(node)
+                node = parents[node]
+            depth = depths[node] if node >= 0 else -1
+            for node in reversed(chain):
+                depth += 1
+                depths[node] = depth
+        
+        image_area = table_structure.shape[0] * table_structure.shape[1]
         
         # Filtrar contornos com critérios ultra permissivos para tabelas pequenas
         table_contours = []
+        owners = []  # Contorno de origem de cada candidato
         
-        for contour in contours:
+        for i, contour in enumerate(contours):
+            if depths[i] % 2 == 1:
+                continue  # Furos não são estruturas; entram como células abaixo
+            
             area = cv2.contourArea(contour)
             
             # Área mínima dinâmica (muito mais baixa para detectar tabelas pequenas)
@@ -306,38 +442,180 @@ class OpenCVTableDetector(QThread):
             if len(approx) < 3:  # Reduzido de 4 para 3
                 continue
             
-            x, y, w, h = cv2.boundingRect(contour)
-            aspect_ratio = w / h
-            
-            # Filtros mais rigorosos
-            min_width, min_height = 100, 60  # Tamanhos mínimos
-            max_area_ratio = 0.8  # Máximo 80% da imagem
-            
-            # Verificações dimensionais
-            if w < min_width or h < min_height:
-                continue
-                
-            if aspect_ratio < 0.8 or aspect_ratio > 15:  # Aspecto mais restrito
+            bbox = cv2.boundingRect(contour)
+            if not self.is_plausible_table_box(bbox, area, image_area):
                 continue
             
-            # Verificar se não é muito grande (provavelmente toda a página)
-            image_area = table_structure.shape[0] * table_structure.shape[1]
-            if area / image_area > max_area_ratio:
-                continue
+            # Células (furos diretos) para separar tabelas com borda compartilhada
+            cells = [cv2.boundingRect(contours[c]) for c in children[i]]
+            groups = self.split_adjacent_tables(cells) if len(cells) >= 4 else []
             
-            table_contours.append({
-                'contour': contour,
-                'bbox': (x, y, w, h),
-                'area': area,
-                'aspect_ratio': aspect_ratio,
-                'preliminary_score': min(1.0, area / 50000)  # Score preliminar
-            })
+            parts = [self.union_bbox(group, margin=3) for group in groups if len(group) >= 2]
+            parts = [part for part in parts if self.is_plausible_table_box(part, part[2] * part[3], image_area)]
+            
+            if len(parts) >= 2:
+                for part in parts:
+                    table_contours.append(self.make_table_candidate(contour, part, part[2] * part[3], depths[i]))
+                    owners.append(i)
+            else:
+                table_contours.append(self.make_table_candidate(contour, bbox, area, depths[i]))
+                owners.append(i)
+        
+        # Moldura e tabela aninhada saem ambas da árvore: manter só a tabela (antes do limite)
+        table_contours = self.drop_enclosing_frames(table_contours, owners, parents, dilated)
         
         # Ordenar por área (maiores primeiro) mas limitando quantidade
         table_contours.sort(key=lambda x: x['area'], reverse=True)
         
-        # Retornar no máximo 10 candidatos para validação posterior
-        return table_contours[:10]
+        # Retornar no máximo max_table_candidates candidatos para validação posterior
+        return table_contours[:self.max_table_candidates]
+    
+    def drop_enclosing_frames(self, candidates, owners, parents, structure, tolerance=3):
+        """Remove candidatos que são só a moldura em volta de outros candidatos
+        
+        Com RETR_TREE uma moldura (profundidade par) e a tabela aninhada nela
+        viram candidatos. Um ancestral que contém candidatos descendentes é
+        descartado quando, tirando a própria borda e os descendentes, não
+        sobra nenhuma régua dele (borda de página/formulário em volta da
+        tabela). Tabelas com réguas próprias e uma tabela aninhada em uma
+        célula são mantidas.
+        """
+        by_contour = {}
+        for position, owner in enumerate(owners):
+            by_contour.setdefault(owner, []).append(position)
+        
+        # Descendentes contidos em cada candidato ancestral
+        nested = {}
+        for position, owner in enumerate(owners):
+            x, y, w, h = candidates[position]['bbox']
+            node = parents[owner]
+            while node >= 0:
+                for outer in by_contour.get(node, []):
+                    ox, oy, ow, oh = candidates[outer]['bbox']
+                    if (x >= ox - tolerance and y >= oy - tolerance and
+                            x + w <= ox + ow + tolerance and y + h <= oy + oh + tolerance):
+                        nested.setdefault(outer, []).append((x, y, w, h))
+                node = parents[node]
+        
+        frames = {outer for outer, inner in nested.items()
+                  if not self.has_own_rulings(structure, candidates[outer]['bbox'], inner)}
+        
+        return [candidate for position, candidate in enumerate(candidates) if position not in frames]
+    
+    def has_own_rulings(self, structure, bbox, inner_boxes, border=8, margin=4):
+        """Há réguas na região fora da borda e das caixas internas?
+        
+        Usa o mesmo critério de comprimento do validate_table_structure: uma
+        régua cobre pelo menos 20% da largura ou da altura da região.
+        """
+        x, y, w, h = bbox
+        region = structure[y:y+h, x:x+w].copy()
+        
+        # Apagar a própria borda e as tabelas aninhadas (com as bordas delas)
+        region[:border, :] = 0
+        region[-border:, :] = 0
+        region[:, :border] = 0
+        region[:, -border:] = 0
+        for ix, iy, iw, ih in inner_boxes:
+            region[max(0, iy - y - margin):max(0, iy - y + ih + margin),
+                   max(0, ix - x - margin):max(0, ix - x + iw + margin)] = 0
+        
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(region, connectivity=8)
+        widths, heights = stats[1:num_labels, cv2.CC_STAT_WIDTH], stats[1:num_labels, cv2.CC_STAT_HEIGHT]
+        return bool(np.any((widths >= w * 0.2) | (heights >= h * 0.2)))
+    
+    def is_plausible_table_box(self, bbox, area, image_area):
+        """Filtros dimensionais de um candidato a tabela"""
+        x, y, w, h = bbox
+        
+        # Filtros mais rigorosos
+        min_width, min_height = 100, 60  # Tamanhos mínimos
+        max_area_ratio = 0.8  # Máximo 80% da imagem
+        
+        # Verificações dimensionais
+        if w < min_width or h < min_height:
+            return False
+        
+        aspect_ratio = w / h
+        if aspect_ratio < 0.8 or aspect_ratio > 15:  # Aspecto mais restrito
+            return False
+        
+        # Verificar se não é muito grande (provavelmente toda a página)
+        return area / image_area <= max_area_ratio
+    
+    def make_table_candidate(self, contour, bbox, area, depth):
+        """Monta o dicionário de um candidato a tabela"""
+        return {
+            'contour': contour,
+            'bbox': bbox,
+            'area': area,
+            'aspect_ratio': bbox[2] / bbox[3],
+            'depth': depth,  # 0 = estrutura externa, 2+ = dentro de moldura
+            'preliminary_score': min(1.0, area / 50000)  # Score preliminar
+        }
+    
+    def union_bbox(self, boxes, margin=0):
+        """Bounding box (x, y, w, h) que envolve todas as caixas"""
+        boxes = np.asarray(boxes)
+        x1 = boxes[:, 0].min() - margin
+        y1 = boxes[:, 1].min() - margin
+        x2 = (boxes[:, 0] + boxes[:, 2]).max() + margin
+        y2 = (boxes[:, 1] + boxes[:, 3]).max() + margin
+        return (int(max(0, x1)), int(max(0, y1)), int(x2 - max(0, x1)), int(y2 - max(0, y1)))
+    
+    def split_adjacent_tables(self, cells, tolerance=6):
+        """Separa células de tabelas que compartilham uma borda
+        
+        Corte recursivo em X/Y: um corte vertical (horizontal) que nenhuma
+        célula atravessa só separa tabelas se as bordas de linha (coluna) dos
+        dois lados não coincidirem.
+        """
+        if len(cells) < 4:
+            return [cells]
+        
+        boxes = np.asarray(cells)
+        
+        for axis in (0, 1):  # 0 = corte vertical, 1 = corte horizontal
+            starts = boxes[:, axis]
+            ends = starts + boxes[:, axis + 2]
+            order = np.argsort(starts, kind='stable')
+            
+            # Posições onde nenhuma célula anterior ultrapassa o início da seguinte
+            reach = np.maximum.accumulate(ends[order])
+            cuts = np.flatnonzero(starts[order][1:] >= reach[:-1] - tolerance) + 1
+            
+            for cut in cuts:
+                first, second = order[:cut], order[cut:]
+                if len(first) < 2 or len(second) < 2:
+                    continue
+                
+                # Bordas perpendiculares ao corte (linhas para corte vertical)
+                other = 1 - axis
+                first_edges = self.edge_signature(boxes[first], other, tolerance)
+                second_edges = self.edge_signature(boxes[second], other, tolerance)
+                
+                if not self.edges_compatible(first_edges, second_edges, tolerance):
+                    return (self.split_adjacent_tables([cells[k] for k in first], tolerance) +
+                            self.split_adjacent_tables([cells[k] for k in second], tolerance))
+        
+        return [cells]
+    
+    def edge_signature(self, boxes, axis, tolerance):
+        """Bordas distintas (agrupadas pela tolerância) de um grupo de células"""
+        edges = np.sort(np.concatenate([boxes[:, axis], boxes[:, axis] + boxes[:, axis + 2]]))
+        keep = np.concatenate([[True], np.diff(edges) > tolerance])
+        return edges[keep]
+    
+    def edges_compatible(self, edges1, edges2, tolerance):
+        """Verifica se um conjunto de bordas está contido no outro (dentro da tolerância)
+        
+        Células mescladas apenas removem bordas; tabelas distintas têm bordas
+        que não existem do outro lado.
+        """
+        smaller, larger = sorted((edges1, edges2), key=len)
+        idx = np.clip(np.searchsorted(larger, smaller), 1, len(larger) - 1)
+        nearest = np.minimum(np.abs(larger[idx] - smaller), np.abs(larger[idx - 1] - smaller))
+        return bool(np.all(nearest <= tolerance))
     
     def detect_table_cells(self, image, table_bbox):
         """Detecta células individuais dentro de uma tabela"""
@@ -520,101 +798,273 @@ class TesseractTableDetector(QThread):
     tables_detected = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, pdf_path, pages="all", language='por'):
+    RENDER_DPI = 150
+    MIN_TABLE_WORDS = 6  # Menos palavras que isso não formam tabela
+    
+    def __init__(self, pdf_path, pages="all", language='por', use_text_layer=True,
+                 ocr_engine="auto", ocr_batch_size=8, roi_ocr=False, roi_dpi=None,
+                 min_text_layer_words=20):
         super().__init__()
         self.pdf_path = pdf_path
         self.pages = pages
         self.language = language
+        self.use_text_layer = use_text_layer  # Usar palavras nativas do PDF quando existirem
+        # Abaixo disso a camada de texto é só cabeçalho/número de página/carimbo: fazer OCR
+        self.min_text_layer_words = max(self.MIN_TABLE_WORDS, min_text_layer_words)
+        self.ocr_engine = ocr_engine  # "auto", "tesserocr" (persistente) ou "pytesseract"
+        self.ocr_batch_size = max(1, ocr_batch_size)  # Páginas por chamada de OCR
+        self.roi_ocr = roi_ocr  # OCR apenas nas regiões candidatas (máscaras OpenCV)
+        self.roi_dpi = roi_dpi  # DPI opcional (maior) para renderizar as regiões
+        self.ocr_backend = None
+        self.ocr_pixels = 0  # Pixels enviados ao OCR (estatística)
+        self.page_pixels = 0  # Pixels das páginas que precisaram de OCR
         self.should_stop = False
     
+    def get_ocr_backend(self):
+        """Backend de OCR criado uma vez e reutilizado entre páginas"""
+        if self.ocr_backend is None:
+            try:
+                self.ocr_backend = create_ocr_backend(self.language, self.ocr_engine)
+            except ImportError:
+                self.error_occurred.emit("Tesseract não instalado. Execute: pip install pytesseract")
+                return None
+        return self.ocr_backend
+    
+    def close_ocr_backend(self):
+        """Libera o motor de OCR (dados de idioma carregados)"""
+        if self.ocr_backend is not None:
+            self.ocr_backend.close()
+            self.ocr_backend = None
+    
+    def text_layer_words(self, page, scale):
+        """Palavras da camada de texto do PDF, escaladas para pixels da renderização"""
+        words = []
+        for x0, y0, x1, y1, text, *_ in page.get_text("words"):
+            if not text.strip():
+                continue
+            words.append({
+                'text': text.strip(),
+                'x': int(round(x0 * scale)),
+                'y': int(round(y0 * scale)),
+                'w': int(round((x1 - x0) * scale)),
+                'h': int(round((y1 - y0) * scale)),
+                'conf': 100  # Texto nativo: posição exata
+            })
+        return words
+    
+    def trusts_text_layer(self, words):
+        """A camada de texto tem conteúdo suficiente para dispensar o OCR?
+        
+        Páginas escaneadas costumam ter só um cabeçalho, o número da página
+        ou um carimbo como texto nativo; nesse caso a tabela está na imagem.
+        """
+        return len(words) >= self.min_text_layer_words
+    
     def analyze_text_layout(self, image):
         """Analisa o layout do texto para detectar estruturas tabulares com maior precisão"""
-        try:
-            import pytesseract
-        except ImportError:
-            self.error_occurred.emit("Tesseract não instalado. Execute: pip install pytesseract")
+        backend = self.get_ocr_backend()
+        if backend is None:
             return []
         
-        # Configurar Tesseract para melhor detecção de layout
-        config = f'--psm 6 -l {self.language} -c preserve_interword_spaces=1'
-        
-        # Obter dados detalhados do OCR com coordenadas
-        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
-        
-        # Filtrar apenas texto com boa confiança
-        valid_words = []
-        for i, text in enumerate(data['text']):
-            if text.strip() and data['conf'][i] > 30:  # Confiança mínima
-                valid_words.append({
-                    'text': text.strip(),
-                    'x': data['left'][i],
-                    'y': data['top'][i],
-                    'w': data['width'][i],
-                    'h': data['height'][i],
-                    'conf': data['conf'][i]
-                })
+        # Palavras com coordenadas e boa confiança
+        valid_words = backend.recognize_words(image)
         
-        if len(valid_words) < 6:  # Muito pouco texto
+        return self.find_tables_in_words(valid_words, image.shape)
+    
+    def analyze_ocr_batch(self, batch):
+        """Executa OCR de várias páginas de uma vez; retorna [(page_num, tabelas)]
+        
+        ``batch`` contém (page_num, imagem, página). No modo ROI apenas as
+        regiões candidatas de cada página são reconhecidas, e as palavras
+        voltam para as coordenadas da imagem da página.
+        """
+        backend = self.get_ocr_backend()
+        if backend is None:
             return []
         
-        # Agrupar palavras por linhas baseado na coordenada Y
-        lines = {}
-        line_tolerance = 15  # Tolerância para considerar mesma linha
-        
-        for word in valid_words:
-            y = word['y']
-            line_key = None
+        # Imagens a reconhecer: (índice na lote, x, y, escala, imagem)
+        crops = []
+        for index, (_, image, page) in enumerate(batch):
+            self.page_pixels += image.shape[0] * image.shape[1]
             
-            # Procurar linha existente próxima
-            for existing_y in lines.keys():
-                if abs(y - existing_y) <= line_tolerance:
-                    line_key = existing_y
-                    break
+            if not self.roi_ocr:
+                self.ocr_pixels += image.shape[0] * image.shape[1]
+                crops.append((index, 0, 0, 1.0, image))
+                continue
             
-            # Se não encontrou, criar nova linha
-            if line_key is None:
-                line_key = y
-                lines[line_key] = []
+            for x, y, w, h in self.propose_ocr_regions(image):
+                self.ocr_pixels += w * h  # Área equivalente na resolução da página
+                crops.append((index, x, y) + self.render_ocr_region(image, page, (x, y, w, h)))
+        
+        word_lists = backend.recognize_batch([crop[4] for crop in crops]) if crops else []
+        
+        page_words = [[] for _ in batch]
+        for (index, x, y, scale, _), words in zip(crops, word_lists):
+            for word in words:
+                page_words[index].append(dict(
+                    word,
+                    x=int(round(x + word['x'] * scale)),
+                    y=int(round(y + word['y'] * scale)),
+                    w=int(round(word['w'] * scale)),
+                    h=int(round(word['h'] * scale))
+                ))
+        
+        return [(page_num, self.find_tables_in_words(words, image.shape))
+                for (page_num, image, _), words in zip(batch, page_words)]
+    
+    def propose_ocr_regions(self, image, min_width=100, min_height=60, margin=10):
+        """Propõe regiões que podem conter tabelas usando máscaras baratas do OpenCV
+        
+        Blocos de texto (binário dilatado) são mantidos quando contêm linhas
+        de régua ou pelo menos uma calha vertical vazia entre colunas de texto.
+        Retorna caixas (x, y, w, h) em pixels da imagem.
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+        
+        # Máscara de linhas de régua (mesmos kernels do detector OpenCV)
+        h_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (80, 1)))
+        v_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, 80)))
+        lines = cv2.bitwise_or(h_lines, v_lines)
+        
+        # Máscara de densidade textual: unir colunas e linhas de texto em blocos
+        # (fechamento não expande as bordas externas do bloco)
+        column_gap = max(151, image.shape[1] // 5)
+        blocks = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (1, 41)),
+                                  borderType=cv2.BORDER_CONSTANT, borderValue=0)
+        blocks = cv2.morphologyEx(blocks, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (column_gap, 1)),
+                                  borderType=cv2.BORDER_CONSTANT, borderValue=0)
+        
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(blocks, connectivity=8)
+        
+        regions = []
+        for x, y, w, h, _ in stats[1:num_labels]:
+            if w < min_width or h < min_height:
+                continue
+            
+            has_lines = cv2.countNonZero(lines[y:y+h, x:x+w]) > 0
+            if not has_lines and self.count_column_gutters(binary[y:y+h, x:x+w]) == 0:
+                continue  # Bloco de texto corrido
             
-            lines[line_key].append(word)
+            x1, y1 = max(0, x - margin), max(0, y - margin)
+            x2 = min(image.shape[1], x + w + margin)
+            y2 = min(image.shape[0], y + h + margin)
+            regions.append((int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
         
-        # Filtrar linhas com pelo menos 2 palavras
-        valid_lines = {k: v for k, v in lines.items() if len(v) >= 2}
+        return regions
+    
+    def count_column_gutters(self, binary_block, min_gap=12):
+        """Conta faixas verticais vazias (entre colunas) dentro de um bloco"""
+        empty = np.concatenate([[0], (np.count_nonzero(binary_block, axis=0) == 0).astype(np.int8), [0]])
+        transitions = np.diff(empty)
+        starts = np.flatnonzero(transitions == 1)
+        ends = np.flatnonzero(transitions == -1)
+        
+        # Ignorar margens do bloco (só calhas internas)
+        internal = (starts > 0) & (ends < binary_block.shape[1])
+        return int(np.count_nonzero((ends - starts >= min_gap) & internal))
+    
+    def render_ocr_region(self, image, page, region):
+        """Imagem da região para OCR e a escala de volta para pixels da página"""
+        x, y, w, h = region
+        if not self.roi_dpi or self.roi_dpi <= self.RENDER_DPI:
+            return 1.0, image[y:y+h, x:x+w]
+        
+        # Renderizar somente o recorte em DPI maior
+        to_pdf = 72.0 / self.RENDER_DPI
+        clip = fitz.Rect(x * to_pdf, y * to_pdf, (x + w) * to_pdf, (y + h) * to_pdf)
+        pix = page.get_pixmap(dpi=self.roi_dpi, clip=clip)
+        crop = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        
+        return w / pix.width, crop
+    
+    def find_tables_in_words(self, words, image_shape):
+        """Detecta tabelas a partir das caixas de palavras (x, y, w, h)"""
+        if len(words) < self.MIN_TABLE_WORDS:  # Muito pouco texto
+            return []
+        
+        # Agrupar palavras em linhas e manter linhas com pelo menos 2 palavras
+        valid_lines = [line for line in self.group_words_into_lines(words) if len(line) >= 2]
         
         if len(valid_lines) < 3:  # Precisa de pelo menos 3 linhas
             return []
         
-        # Detectar tabelas baseado em alinhamento de colunas
+        # Segmentar sequências máximas de linhas alinhadas (sem sobreposição)
         potential_tables = []
+        for line_group in self.segment_aligned_runs(valid_lines):
+            table_data = self.validate_table_from_lines(line_group, image_shape)
+            if table_data:
+                potential_tables.append(table_data)
         
-        # Ordenar linhas por posição Y
-        sorted_lines = sorted(valid_lines.items(), key=lambda x: x[0])
+        return potential_tables
+    
+    def group_words_into_lines(self, words, line_tolerance=15):
+        """Agrupa palavras em linhas com uma varredura ordenada por Y
+        
+        Uma linha começa na primeira palavra (menor Y) e recebe as seguintes
+        enquanto estiverem a até ``line_tolerance`` pixels dela. Cada linha
+        volta ordenada por X.
+        """
+        ordered = sorted(words, key=lambda word: word['y'])
+        
+        lines = []
+        line_top = None
+        for word in ordered:
+            if line_top is None or word['y'] - line_top > line_tolerance:
+                line_top = word['y']
+                lines.append([])
+            lines[-1].append(word)
+        
+        for line in lines:
+            line.sort(key=lambda word: word['x'])
         
-        # Analisar grupos consecutivos de linhas
-        for i in range(len(sorted_lines) - 2):  # Pelo menos 3 linhas
-            line_group = []
+        return lines
+    
+    def segment_aligned_runs(self, lines, min_consistency=0.4, min_lines=3, gap_factor=2.5):
+        """Divide as linhas em sequências máximas alinhadas à primeira linha
+        
+        Uma sequência termina na primeira linha cuja similaridade de colunas
+        com a linha inicial fica abaixo de ``min_consistency`` ou que está
+        separada da anterior por mais de ``gap_factor`` vezes o espaçamento
+        mediano entre linhas. Uma única linha desalinhada (célula quebrada ou
+        linha mesclada) é tolerada quando a seguinte volta a alinhar; vãos
+        grandes sempre encerram a sequência. Cada linha é avaliada uma única
+        vez por início.
+        """
+        tops = np.array([line[0]['y'] for line in lines], dtype=np.float64)
+        gaps = np.diff(tops)
+        max_gap = gap_factor * np.median(gaps) if len(gaps) else 0
+        
+        runs = []
+        start = 0
+        while start <= len(lines) - min_lines:
+            reference = [word['x'] for word in lines[start]]
             
-            # Coletar linhas consecutivas similares
-            for j in range(i, min(i + 10, len(sorted_lines))):  # Máximo 10 linhas
-                current_line = sorted_lines[j][1]
+            end = start + 1
+            while end < len(lines):
+                # Avaliar um bloco de linhas seguintes (mais uma de folga) em uma chamada vetorizada
+                block = lines[end:end + 17]
+                scores = self.calculate_group_similarity(reference, [[word['x'] for word in line] for line in block])
+                block_gaps = tops[end:end + len(block)] - tops[end - 1:end - 1 + len(block)]
                 
-                # Ordenar palavras por posição X
-                current_line.sort(key=lambda x: x['x'])
+                close = block_gaps <= max_gap
+                aligned = (scores >= min_consistency) & close
+                # Linha desalinhada isolada: tolerada se a próxima volta a alinhar
+                tolerated = close & np.append(aligned[1:], False)
                 
-                if len(current_line) >= 2:  # Pelo menos 2 colunas
-                    line_group.append(current_line)
-                else:
-                    break  # Quebrar sequência se linha inválida
+                failing = np.flatnonzero(~(aligned | tolerated)[:16])
+                if len(failing):
+                    end += int(failing[0])
+                    break
+                end += min(len(block), 16)
             
-            if len(line_group) >= 3:  # Pelo menos 3 linhas válidas
-                table_data = self.validate_table_from_lines(line_group, image.shape)
-                if table_data:
-                    potential_tables.append(table_data)
-        
-        # Remover tabelas sobrepostas (manter a maior)
-        filtered_tables = self.remove_overlapping_tables(potential_tables)
+            if end - start >= min_lines:
+                runs.append(lines[start:end])
+                start = end
+            else:
+                start += 1
         
-        return filtered_tables
+        return runs
     
     def validate_table_from_lines(self, line_group, image_shape):
         """Valida se um grupo de linhas forma uma tabela válida"""
@@ -625,16 +1075,12 @@ class TesseractTableDetector(QThread):
         first_line = line_group[0]
         column_positions = [word['x'] for word in first_line]
         
-        # Verificar consistência de colunas em outras linhas
-        column_consistency_scores = []
-        
-        for line in line_group[1:]:
-            line_positions = [word['x'] for word in line]
-            consistency = self.calculate_position_similarity(column_positions, line_positions)
-            column_consistency_scores.append(consistency)
+        # Verificar consistência de colunas em outras linhas (uma chamada vetorizada)
+        line_positions = [[word['x'] for word in line] for line in line_group[1:]]
+        column_consistency_scores = self.calculate_group_similarity(column_positions, line_positions)
         
         # Média de consistência
-        avg_consistency = sum(column_consistency_scores) / len(column_consistency_scores)
+        avg_consistency = float(np.mean(column_consistency_scores))
         
         if avg_consistency < 0.4:  # Reduzido de 60% para 40%
             return None
@@ -716,72 +1162,15 @@ class TesseractTableDetector(QThread):
         
         return score
     
-    def remove_overlapping_tables(self, tables):
-        """Remove tabelas sobrepostas, mantendo a melhor"""
-        if len(tables) <= 1:
-            return tables
-        
-        # Ordenar por confiança (melhor primeiro)
-        tables.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        filtered = []
-        
-        for table in tables:
-            bbox1 = table['bbox']
-            overlaps = False
-            
-            for existing in filtered:
-                bbox2 = existing['bbox']
-                
-                # Calcular sobreposição
-                overlap_area = self.calculate_bbox_overlap(bbox1, bbox2)
-                area1 = bbox1[2] * bbox1[3]
-                area2 = bbox2[2] * bbox2[3]
-                
-                # Se sobreposição > 50% da menor área, considerar duplicata
-                min_area = min(area1, area2)
-                if overlap_area / min_area > 0.5:
-                    overlaps = True
-                    break
-            
-            if not overlaps:
-                filtered.append(table)
-        
-        return filtered
-    
-    def calculate_bbox_overlap(self, bbox1, bbox2):
-        """Calcula área de sobreposição entre dois bounding boxes"""
-        x1, y1, w1, h1 = bbox1
-        x2, y2, w2, h2 = bbox2
-        
-        # Coordenadas dos retângulos
-        left1, top1, right1, bottom1 = x1, y1, x1 + w1, y1 + h1
-        left2, top2, right2, bottom2 = x2, y2, x2 + w2, y2 + h2
-        
-        # Calcular interseção
-        left = max(left1, left2)
-        top = max(top1, top2)
-        right = min(right1, right2)
-        bottom = min(bottom1, bottom2)
-        
-        if left < right and top < bottom:
-            return (right - left) * (bottom - top)
-        else:
-            return 0
-
-    def calculate_position_similarity(self, pos1, pos2):
-        """Calcula similaridade entre posições de colunas"""
-        if len(pos1) != len(pos2):
-            return 0.0
-        
-        tolerance = 20
-        matches = 0
-        
-        for p1, p2 in zip(pos1, pos2):
-            if abs(p1 - p2) <= tolerance:
-                matches += 1
-        
-        return matches / len(pos1)
+    def calculate_group_similarity(self, column_positions, lines_positions, tolerance=20):
+        """Similaridade de cada linha com as colunas de referência
+        
+        Colunas a mais ou a menos reduzem o score proporcionalmente (divide
+        pelo maior número de colunas) em vez de zerá-lo.
+        """
+        matches = count_aligned_anchors(column_positions, lines_positions, tolerance)
+        sizes = np.array([max(len(column_positions), len(line)) for line in lines_positions])
+        return np.divide(matches, sizes, out=np.zeros(len(sizes)), where=sizes > 0)
     
     def run(self):
         """Executa a detecção usando Tesseract"""
@@ -797,6 +1186,7 @@ class TesseractTableDetector(QThread):
                 pages_to_process = self.parse_page_range(self.pages, total_pages)
             
             detected_tables = []
+            ocr_batch = []  # Páginas sem texto aguardando OCR: (page_num, imagem)
             
             for i, page_num in enumerate(pages_to_process):
                 if self.should_stop:
@@ -805,43 +1195,74 @@ class TesseractTableDetector(QThread):
                 progress = 10 + int((i / len(pages_to_process)) * 80)
                 self.progress_updated.emit(progress, f"Analisando texto da página {page_num + 1}...")
                 
-                # Renderizar página
                 page = doc.load_page(page_num)
-                pix = page.get_pixmap(dpi=150)
+                scale = self.RENDER_DPI / 72.0
+                
+                # Camada de texto nativa: mesmas coordenadas da renderização, sem OCR
+                words = self.text_layer_words(page, scale) if self.use_text_layer else []
+                
+                if self.trusts_text_layer(words):
+                    image_rect = (page.rect * fitz.Matrix(scale, scale)).irect
+                    tables = self.find_tables_in_words(words, (image_rect.height, image_rect.width, 3))
+                    detected_tables.extend(self.build_table_results(page_num, tables, 'text_layer'))
+                    continue
+                
+                # Sem texto extraível (ou quase nenhum): renderizar e enfileirar para OCR
+                pix = page.get_pixmap(dpi=self.RENDER_DPI)
                 img_data = pix.samples
                 
                 # Converter para OpenCV
                 img = np.frombuffer(img_data, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+                ocr_batch.append((page_num, img, page))
                 
-                # Detectar tabelas via análise de texto inteligente
-                tables = self.analyze_text_layout(img)
-                
-                for j, table in enumerate(tables):
-                    # Só aceitar tabelas com confiança >= 50% (mais permissivo)
-                    if table['confidence'] >= 0.5:
-                        table_data = {
-                            'page': page_num + 1,
-                            'table_index': j,
-                            'bbox': table['bbox'],
-                            'estimated_rows': table['row_count'],
-                            'estimated_cols': table['column_count'],
-                            'detection_method': 'tesseract_intelligent_analysis_v2',
-                            'confidence': table['confidence'],
-                            'column_consistency': table.get('column_consistency', 0.0),
-                            'word_count': table.get('word_count', 0),
-                            'validation_passed': True,
-                            'tight_bbox': table.get('tight_bbox', False)  # Indicar bbox otimizado
-                        }
-                        detected_tables.append(table_data)
+                if len(ocr_batch) >= self.ocr_batch_size:
+                    self.progress_updated.emit(progress, f"OCR de {len(ocr_batch)} página(s)...")
+                    for batch_page, tables in self.analyze_ocr_batch(ocr_batch):
+                        detected_tables.extend(self.build_table_results(batch_page, tables, 'ocr'))
+                    ocr_batch = []
+            
+            if ocr_batch and not self.should_stop:
+                self.progress_updated.emit(90, f"OCR de {len(ocr_batch)} página(s)...")
+                for batch_page, tables in self.analyze_ocr_batch(ocr_batch):
+                    detected_tables.extend(self.build_table_results(batch_page, tables, 'ocr'))
             
             doc.close()
+            self.close_ocr_backend()
+            
+            detected_tables.sort(key=lambda t: (t['page'], t['table_index']))
             
-            self.progress_updated.emit(100, f"Análise OCR concluída! {len(detected_tables)} tabelas encontradas")
+            message = f"Análise OCR concluída! {len(detected_tables)} tabelas encontradas"
+            if self.roi_ocr and self.page_pixels:
+                message += f" (OCR em {self.ocr_pixels / self.page_pixels:.0%} da área)"
+            self.progress_updated.emit(100, message)
             self.tables_detected.emit(detected_tables)
             
         except Exception as e:
+            self.close_ocr_backend()
             self.error_occurred.emit(f"Erro na detecção Tesseract: {str(e)}")
     
+    def build_table_results(self, page_num, tables, text_source):
+        """Monta os resultados de uma página (página 0-based)"""
+        results = []
+        for j, table in enumerate(tables):
+            # Só aceitar tabelas com confiança >= 50% (mais permissivo)
+            if table['confidence'] >= 0.5:
+                results.append({
+                    'page': page_num + 1,
+                    'table_index': j,
+                    'bbox': table['bbox'],
+                    'estimated_rows': table['row_count'],
+                    'estimated_cols': table['column_count'],
+                    'detection_method': 'tesseract_intelligent_analysis_v2',
+                    'confidence': table['confidence'],
+                    'column_consistency': table.get('column_consistency', 0.0),
+                    'word_count': table.get('word_count', 0),
+                    'validation_passed': True,
+                    'text_source': text_source,  # 'text_layer' ou 'ocr'
+                    'tight_bbox': table.get('tight_bbox', False)  # Indicar bbox otimizado
+                })
+        return results
+    
     def parse_page_range(self, page_str, total_pages):
         """Converte string de páginas em lista de índices"""
         pages = []
@@ -6,6 +6,15 @@ Versão otimizada com carregamento por lotes para manter qualidade
 """
 
 import sys
+import time
+import bisect
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict, deque
+import numpy as np
 import fitz  # PyMuPDF
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFileDialog, QPushButton, 
@@ -13,8 +22,9 @@ from PyQt5.QtWidgets import (
     QGroupBox, QFormLayout, QTextEdit, QCheckBox, QComboBox, QListWidget, QListWidgetItem,
     QSplitter
 )
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor, QPen, QCursor, QPolygon, QFont
-from PyQt5.QtCore import Qt, QRect, QPoint, pyqtSignal, QThread
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor, QPen, QPolygon, QFont
+from PyQt5.QtCore import Qt, QRect, QPoint, pyqtSignal, QThread, QTimer
+from PyQt5 import sip
 import os
 from dotenv import load_dotenv
 import json
@@ -22,38 +32,243 @@ import datetime
 import platform
 import subprocess
 import base64
-import camelot
-import pandas as pd
-from opencv_table_detector import OpenCVTableDetector, TesseractTableDetector
-from multi_pass_detector import MultiPassTableDetector
+from render_cache import RenderCache
+import render_workers
 
-# Import condicional do OpenAI (opcional)
-try:
-    import openai
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
-    print("⚠️ OpenAI não instalado - funcionalidade de IA limitada")
+# Os processos de renderização/exportação (spawn) reimportam este script como
+# __mp_main__: detectores, Camelot, pandas e OpenAI só são carregados na interface
+if __name__ != "__mp_main__":
+    import camelot
+    import pandas as pd
+    from opencv_table_detector import OpenCVTableDetector, TesseractTableDetector
+    from multi_pass_detector import MultiPassTableDetector
+    from enhanced_opencv_detector import EnhancedTableDetector
+    
+    # Import condicional do OpenAI (opcional)
+    try:
+        import openai
+        HAS_OPENAI = True
+    except ImportError:
+        HAS_OPENAI = False
+        print("⚠️ OpenAI não instalado - funcionalidade de IA limitada")
 
 
 class PDFLoaderThread(QThread):
-    """Thread para carregamento progressivo de PDF por lotes"""
+    """Thread de renderização sob demanda das páginas do PDF
+    
+    Abre o documento, informa o tamanho de todas as páginas (sem renderizar)
+    e depois renderiza apenas as páginas pedidas pelo visualizador, na ordem
+    de prioridade da última requisição. Cada pedido traz a resolução
+    desejada: prévias em DPI baixo primeiro, resolução cheia (ou maior, para
+    zoom) em seguida. Com um RenderCache, páginas já renderizadas em outra
+    sessão são lidas do disco em vez de rasterizadas de novo.
+    
+    A rasterização roda em um pool de processos (cada um com o próprio
+    documento) que escreve os pixels em memória compartilhada criada por esta
+    thread; no máximo um pedido por processo fica em andamento, para que a
+    rolagem continue repriorizando a fila. Enquanto os processos iniciam, e
+    com ``max_workers`` <= 1, as páginas são renderizadas aqui mesmo.
+    
+    As páginas prontas vão para uma fila limitada (``max_queued_pages``);
+    ``pages_ready`` avisa a interface quando a fila deixa de estar vazia e ela
+    consome com take_rendered no seu ritmo. Com a fila cheia a thread espera,
+    sem acumular rasters em trânsito.
+    """
     progress_updated = pyqtSignal(int, str)  # progresso, mensagem
-    batch_loaded = pyqtSignal(int, list)     # batch_number, list of (page_idx, QImage)
-    loading_finished = pyqtSignal()
+    document_loaded = pyqtSignal(list)       # tamanhos das páginas em pixels [(w, h), ...]
+    pages_ready = pyqtSignal()               # fila de páginas prontas deixou de estar vazia
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, pdf_path, batch_size=50, dpi=150):
+    def __init__(self, pdf_path, dpi=150, cache=None, max_workers=None, max_queued_pages=6):
         super().__init__()
         self.pdf_path = pdf_path
-        self.batch_size = batch_size
         self.dpi = dpi
+        self.cache = cache
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 1) - 1))
+        self.doc_key = None  # Hash do conteúdo do PDF no cache
         self.doc = None
         self.total_pages = 0
         self.should_stop = False
+        self.pending = []  # Pedidos (page_idx, dpi), mais prioritário primeiro
+        self.condition = threading.Condition()
+        self.pool = None
+        self.pool_ready = False
+        self.in_flight = {}  # future -> ((page_idx, dpi), bloco de memória compartilhada)
+        self.completed = []  # Futures concluídos, entregues pela callback do pool
+        self.max_queued_pages = max_queued_pages
+        self.delivered = deque()  # (page_idx, PageRaster) aguardando a interface
+        self.delivery_condition = threading.Condition()
+    
+    def request_pages(self, requests):
+        """Substitui a fila de renderização (chamado pela thread da interface)
+        
+        ``requests`` é uma lista de (page_idx, dpi) em ordem de prioridade.
+        """
+        with self.condition:
+            self.pending = list(requests)
+            self.condition.notify()
+    
+    def can_dispatch(self):
+        """Há pedido na fila e um processo livre (ou renderização local)"""
+        if not self.pending:
+            return False
+        return not self.pool_ready or len(self.in_flight) < self.max_workers
+    
+    def next_work(self):
+        """Aguarda renderizações concluídas e/ou o próximo pedido a despachar
+        
+        Retorna (futures concluídos, pedido ou None); None quando a thread
+        deve parar.
+        """
+        with self.condition:
+            while not self.should_stop and not self.completed and not self.can_dispatch():
+                self.condition.wait()
+            if self.should_stop:
+                return None
+            
+            completed, self.completed = self.completed, []
+            request = None
+            busy = {key for key, _ in self.in_flight.values()}
+            while self.can_dispatch() and request is None:
+                candidate = self.pending.pop(0)
+                if candidate not in busy:
+                    request = candidate
+            return completed, request
+    
+    def on_render_done(self, future):
+        """Callback do pool (outra thread): entrega o resultado ao laço principal"""
+        with self.condition:
+            self.completed.append(future)
+            self.condition.notify()
+    
+    def on_worker_ready(self, future):
+        with self.condition:
+            if not future.exception():
+                self.pool_ready = True
+            self.condition.notify()
+    
+    def start_render_pool(self):
+        """Inicia os processos de renderização (spawn: seguro com threads do Qt)"""
+        if self.max_workers <= 1:
+            return
+        
+        try:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=render_workers.init_render_worker,
+                initargs=(self.pdf_path,)
+            )
+            for _ in range(self.max_workers):
+                self.pool.submit(render_workers.warm_up).add_done_callback(self.on_worker_ready)
+        except Exception as e:
+            print(f"⚠️ Renderização paralela indisponível, usando uma thread: {e}")
+            self.pool = None
+    
+    def dispatch(self, request):
+        """Atende um pedido: cache em disco, pool de processos ou renderização local"""
+        page_idx, dpi = request
+        
+        if self.doc_key:
+            pix = self.cache.load_page(self.doc_key, page_idx, dpi)
+            if pix is not None:
+                self.deliver(page_idx, PageRaster(pix, dpi=dpi))
+                return
+        
+        if not self.pool_ready:
+            self.store_and_deliver(page_idx, dpi, self.render_page(page_idx, dpi))
+            return
+        
+        # Bloco com o tamanho exato da página nessa resolução
+        matrix = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+        rect = (self.doc.load_page(page_idx).rect * matrix).irect
+        shm = shared_memory.SharedMemory(create=True, size=max(1, rect.width * rect.height * 3))
+        try:
+            future = self.pool.submit(render_workers.render_page_into, page_idx, dpi, shm.name)
+        except BrokenProcessPool:
+            self.release_buffer(shm)
+            self.pool_ready = False  # Processos morreram: seguir renderizando aqui
+            self.store_and_deliver(page_idx, dpi, self.render_page(page_idx, dpi))
+            return
+        except Exception:
+            self.release_buffer(shm)
+            raise
+        
+        with self.condition:
+            self.in_flight[future] = (request, shm)
+        future.add_done_callback(self.on_render_done)
+    
+    def finish_render(self, future):
+        """Transforma o bloco preenchido pelo processo em PageRaster (sem cópia)"""
+        with self.condition:
+            (page_idx, dpi), shm = self.in_flight.pop(future)
+        
+        error = future.exception()
+        if error is not None:
+            self.release_buffer(shm)
+            if isinstance(error, BrokenProcessPool):
+                self.pool_ready = False  # Processos morreram: seguir renderizando aqui
+            else:
+                # Ex.: ValueError do processo quando o pixmap não coube no bloco
+                print(f"⚠️ Página {page_idx} falhou no processo ({error}), renderizando localmente")
+            try:
+                self.store_and_deliver(page_idx, dpi, self.render_page(page_idx, dpi))
+            except Exception as e:
+                print(f"Erro ao carregar página {page_idx}: {e}")
+            return
         
+        width, height, stride = future.result()
+        shm.unlink()  # O mapeamento continua válido até o raster ser coletado
+        self.store_and_deliver(page_idx, dpi, PageRaster(shm, width, height, stride, dpi=dpi))
+    
+    def store_and_deliver(self, page_idx, dpi, raster):
+        # Prévias são baratas de refazer: só vão para o disco as de resolução cheia
+        if self.doc_key and dpi >= self.dpi:
+            self.cache.store_page(self.doc_key, page_idx, dpi, raster)
+        self.deliver(page_idx, raster)
+    
+    def deliver(self, page_idx, raster):
+        """Coloca a página na fila da interface, esperando enquanto ela estiver cheia"""
+        with self.delivery_condition:
+            while len(self.delivered) >= self.max_queued_pages and not self.should_stop:
+                self.delivery_condition.wait()
+            if self.should_stop:
+                return
+            was_empty = not self.delivered
+            self.delivered.append((page_idx, raster))
+        
+        if was_empty:
+            self.pages_ready.emit()
+    
+    def take_rendered(self):
+        """Próxima página pronta (chamado pela thread da interface), ou None"""
+        with self.delivery_condition:
+            if not self.delivered:
+                return None
+            item = self.delivered.popleft()
+            self.delivery_condition.notify()
+        return item
+    
+    def release_buffer(self, shm):
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    
+    def shutdown_render_pool(self):
+        """Encerra os processos e libera os blocos de pedidos não entregues"""
+        if self.pool is None:
+            return
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for _, shm in self.in_flight.values():
+            self.release_buffer(shm)
+        self.in_flight.clear()
+        self.completed.clear()
+        self.pool = None
+    
     def run(self):
-        """Executa o carregamento progressivo"""
+        """Lê os tamanhos das páginas e atende os pedidos de renderização"""
         try:
             # Abrir PDF
             self.progress_updated.emit(0, "Abrindo PDF...")
@@ -64,68 +279,337 @@ class PDFLoaderThread(QThread):
                 self.error_occurred.emit("PDF não possui páginas")
                 return
             
-            # Calcular número de lotes
-            num_batches = (self.total_pages + self.batch_size - 1) // self.batch_size
-            
-            # Processar por lotes
-            for batch_num in range(num_batches):
+            # Tamanho de cada página na resolução de exibição (sem renderizar)
+            matrix = fitz.Matrix(self.dpi / 72.0, self.dpi / 72.0)
+            page_sizes = []
+            for page_idx in range(self.total_pages):
                 if self.should_stop:
+                    return
+                
+                rect = (self.doc.load_page(page_idx).rect * matrix).irect
+                page_sizes.append((rect.width, rect.height))
+                
+                if page_idx % 200 == 0:
+                    self.progress_updated.emit(
+                        int(page_idx / self.total_pages * 100),
+                        f"Lendo páginas {page_idx + 1}/{self.total_pages}..."
+                    )
+            
+            self.document_loaded.emit(page_sizes)
+            self.progress_updated.emit(100, f"PDF aberto! {self.total_pages} páginas")
+            
+            # Cache em disco: hash já conhecido é usado na hora; senão é
+            # calculado em segundo plano e o cache só é ativado quando terminar
+            if self.cache is not None:
+                try:
+                    self.doc_key = self.cache.known_content_key(self.pdf_path)
+                except OSError as e:
+                    print(f"⚠️ Cache de páginas desativado: {e}")
+                else:
+                    if self.doc_key is None:
+                        threading.Thread(target=self.compute_doc_key, daemon=True).start()
+            
+            # Renderizar sob demanda, entregando as páginas conforme ficam prontas
+            self.start_render_pool()
+            while True:
+                work = self.next_work()
+                if work is None:
                     break
-                    
-                start_page = batch_num * self.batch_size
-                end_page = min((batch_num + 1) * self.batch_size, self.total_pages)
                 
-                self.progress_updated.emit(
-                    int((batch_num / num_batches) * 100),
-                    f"Carregando lote {batch_num + 1}/{num_batches} - Páginas {start_page + 1} a {end_page}"
-                )
+                completed, request = work
+                for future in completed:
+                    self.finish_render(future)
                 
-                # Carregar páginas do lote atual
-                batch_pages = []
-                for page_idx in range(start_page, end_page):
-                    if self.should_stop:
-                        break
-                        
-                    try:
-                        page = self.doc.load_page(page_idx)
-                        pix = page.get_pixmap(dpi=self.dpi)
-                        img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                        batch_pages.append((page_idx, img.copy()))
-                        
-                        # Mini-update dentro do lote
-                        pages_in_batch = end_page - start_page
-                        current_in_batch = page_idx - start_page + 1
-                        
-                        if current_in_batch % 10 == 0:  # Atualiza a cada 10 páginas
-                            self.progress_updated.emit(
-                                int(((batch_num + current_in_batch/pages_in_batch) / num_batches) * 100),
-                                f"Lote {batch_num + 1}/{num_batches} - Página {page_idx + 1}/{self.total_pages}"
-                            )
-                    
-                    except Exception as e:
-                        print(f"Erro ao carregar página {page_idx}: {e}")
-                        continue
+                if request is None:
+                    continue
+                try:
+                    self.dispatch(request)
                 
-                # Emitir lote carregado
-                if batch_pages and not self.should_stop:
-                    self.batch_loaded.emit(batch_num, batch_pages)
-            
-            if not self.should_stop:
-                self.progress_updated.emit(100, f"Carregamento concluído! {self.total_pages} páginas carregadas")
-                self.loading_finished.emit()
+                except Exception as e:
+                    print(f"Erro ao carregar página {request[0]}: {e}")
+                    continue
                 
         except Exception as e:
             self.error_occurred.emit(f"Erro ao carregar PDF: {str(e)}")
         
         finally:
+            self.shutdown_render_pool()
             if self.doc:
                 self.doc.close()
     
+    def compute_doc_key(self):
+        """Calcula o hash do PDF fora do caminho crítico (thread auxiliar)"""
+        try:
+            doc_key = self.cache.content_key(self.pdf_path)
+        except OSError as e:
+            print(f"⚠️ Cache de páginas desativado: {e}")
+            return
+        if not self.should_stop:
+            self.doc_key = doc_key
+    
+    def render_page(self, page_idx, dpi):
+        """Renderiza a página nesta thread (sem pool ou enquanto ele inicia)"""
+        page = self.doc.load_page(page_idx)
+        return PageRaster(page.get_pixmap(dpi=dpi), dpi=dpi)
+    
     def stop(self):
         """Para o carregamento"""
+        with self.condition:
+            self.should_stop = True
+            self.condition.notify()
+        with self.delivery_condition:
+            self.delivery_condition.notify()
+
+
+class PageRaster:
+    """Raster único de uma página, compartilhado por referência
+    
+    A QImage aponta diretamente para o buffer de pixels (Pixmap do PyMuPDF,
+    bloco de memória compartilhada ou array), sem cópia. Quem usa a imagem guarda uma referência a este
+    objeto; o buffer é liberado quando a última referência cai.
+    """
+    
+    __slots__ = ('buffer', 'image', 'dpi')
+    
+    def __init__(self, buffer, width=None, height=None, stride=None, dpi=None):
+        if isinstance(buffer, fitz.Pixmap):
+            width, height, stride = buffer.width, buffer.height, buffer.stride
+            address = buffer.samples_ptr
+        elif isinstance(buffer, shared_memory.SharedMemory):
+            address = np.frombuffer(buffer.buf, dtype=np.uint8).ctypes.data
+        else:
+            address = buffer.ctypes.data  # numpy uint8 contíguo
+        
+        self.buffer = buffer  # Mantém os pixels vivos enquanto a QImage existir
+        self.dpi = dpi
+        self.image = QImage(sip.voidptr(address), width, height, stride, QImage.Format_RGB888)
+    
+    @property
+    def nbytes(self):
+        return self.image.bytesPerLine() * self.image.height()
+
+
+class PageRasterStore:
+    """Dono dos rasters das páginas em memória, com descarte LRU sob um orçamento"""
+    
+    def __init__(self, budget_mb=512):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.rasters = OrderedDict()  # page_idx -> PageRaster (menos usado primeiro)
+        self.used_bytes = 0
+    
+    def __contains__(self, page_idx):
+        return page_idx in self.rasters
+    
+    def get(self, page_idx):
+        """Raster da página (ou None), marcando-o como usado recentemente"""
+        raster = self.rasters.get(page_idx)
+        if raster is not None:
+            self.rasters.move_to_end(page_idx)
+        return raster
+    
+    def has_resolution(self, page_idx, dpi):
+        """Verifica se a página já está em memória com pelo menos ``dpi``"""
+        raster = self.rasters.get(page_idx)
+        return raster is not None and raster.dpi >= dpi
+    
+    def put(self, page_idx, raster, protected=()):
+        """Guarda o raster e descarta os menos usados se passar do orçamento
+        
+        Uma prévia que chegue depois da versão em resolução maior é ignorada.
+        """
+        current = self.rasters.get(page_idx)
+        if current is not None and current.dpi > raster.dpi:
+            return
+        self.remove(page_idx)
+        self.rasters[page_idx] = raster
+        self.used_bytes += raster.nbytes
+        self.evict(protected)
+    
+    def remove(self, page_idx):
+        raster = self.rasters.pop(page_idx, None)
+        if raster is not None:
+            self.used_bytes -= raster.nbytes
+    
+    def evict(self, protected=()):
+        """Descarta rasters fora de ``protected`` até caber no orçamento"""
+        for page_idx in list(self.rasters):
+            if self.used_bytes <= self.budget_bytes:
+                break
+            if page_idx not in protected:
+                self.remove(page_idx)
+    
+    def set_budget(self, budget_mb, protected=()):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.evict(protected)
+    
+    def clear(self):
+        self.rasters.clear()
+        self.used_bytes = 0
+
+
+class TableExportThread(QThread):
+    """Exportação de tabelas em segundo plano
+    
+    Agrupa os jobs pela primeira página de cada um (cada página é carregada
+    uma vez por grupo), renderiza e grava os PNGs em um pool de processos e,
+    no fim (inclusive ao cancelar), grava o JSONL com as entradas das
+    imagens salvas, na ordem original. Um job é um dict com 'image_path',
+    'dpi', 'parts' [(page_idx, bbox), ...], opcionalmente 'margin' e
+    'bottom_origin' (ver render_workers.export_table_group) e 'entry' (linha
+    do JSONL).
+    """
+    progress_updated = pyqtSignal(int, str)  # progresso, mensagem
+    export_finished = pyqtSignal(dict)       # resumo: saved, skipped, cancelled, jsonl_path
+    error_occurred = pyqtSignal(str)
+    
+    def __init__(self, pdf_path, jobs, jsonl_path=None, max_workers=None):
+        super().__init__()
+        self.pdf_path = pdf_path
+        self.jobs = list(jobs)
+        self.jsonl_path = jsonl_path
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 1) - 1))
+        self.should_stop = False
+    
+    def group_jobs(self):
+        """Lista de grupos [(índice, job), ...] por página, em ordem de página"""
+        groups = {}
+        for job_index, job in enumerate(self.jobs):
+            groups.setdefault(job['parts'][0][0], []).append((job_index, job))
+        return [groups[page_idx] for page_idx in sorted(groups)]
+    
+    def run(self):
+        try:
+            groups = self.group_jobs()
+            results = {}
+            done_groups = 0
+            workers = min(self.max_workers, len(groups))
+            
+            self.progress_updated.emit(0, f"Exportando {len(self.jobs)} tabela(s) de {len(groups)} página(s)...")
+            
+            if workers <= 1:
+                # Poucas páginas: não compensa iniciar processos
+                for group in groups:
+                    if self.should_stop:
+                        break
+                    results.update(render_workers.export_table_group(self.pdf_path, group))
+                    done_groups += 1
+                    self.report_progress(done_groups, len(groups), len(results))
+            else:
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                pending = set()
+                try:
+                    pending = {pool.submit(render_workers.export_table_group, self.pdf_path, group) for group in groups}
+                    while pending and not self.should_stop:
+                        done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            results.update(future.result())
+                            done_groups += 1
+                        if done:
+                            self.report_progress(done_groups, len(groups), len(results))
+                finally:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                
+                # Grupos que já estavam rodando quando a exportação foi cancelada
+                for future in pending:
+                    if not future.cancelled() and future.exception() is None:
+                        results.update(future.result())
+            
+            saved = [i for i in sorted(results) if results[i]]
+            summary = {
+                'saved': [self.jobs[i]['image_path'] for i in saved],
+                'skipped': sum(1 for ok in results.values() if not ok),
+                'cancelled': self.should_stop,
+                'jsonl_path': None
+            }
+            
+            # JSONL com as imagens salvas, também ao cancelar (nenhum PNG fica sem índice)
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'w', encoding='utf-8') as f:
+                    for i in saved:
+                        entry = self.jobs[i].get('entry')
+                        if entry is not None:
+                            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                summary['jsonl_path'] = self.jsonl_path
+            
+            self.export_finished.emit(summary)
+            
+        except Exception as e:
+            self.error_occurred.emit(f"Erro ao exportar: {str(e)}")
+    
+    def report_progress(self, done_groups, total_groups, done_tables):
+        self.progress_updated.emit(
+            int(done_groups / total_groups * 100),
+            f"Página {done_groups}/{total_groups} - {done_tables}/{len(self.jobs)} tabela(s)"
+        )
+    
+    def stop(self):
+        """Cancela: grupos ainda não iniciados são descartados"""
         self.should_stop = True
 
 
+class ExportProgressPanel(QWidget):
+    """Progresso e cancelamento de um TableExportThread, reaproveitado pelas abas"""
+    
+    export_finished = pyqtSignal(dict)
+    
+    def __init__(self):
+        super().__init__()
+        self.export_thread = None
+        
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_label = QLabel("")
+        self.progress_bar = QProgressBar()
+        self.cancel_btn = QPushButton("⏹️ Cancelar Exportação")
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.progress_label)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.cancel_btn)
+        self.setVisible(False)
+    
+    def is_running(self):
+        return self.export_thread is not None and self.export_thread.isRunning()
+    
+    def start(self, pdf_path, jobs, jsonl_path=None):
+        """Inicia a exportação; False se já houver uma em andamento"""
+        if self.is_running():
+            QMessageBox.warning(self, "Aviso", "Aguarde a exportação em andamento terminar!")
+            return False
+        
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Preparando exportação...")
+        self.cancel_btn.setEnabled(True)
+        self.setVisible(True)
+        
+        self.export_thread = TableExportThread(pdf_path, jobs, jsonl_path)
+        self.export_thread.progress_updated.connect(self.update_progress)
+        self.export_thread.export_finished.connect(self.on_finished)
+        self.export_thread.error_occurred.connect(self.on_error)
+        self.export_thread.start()
+        return True
+    
+    def update_progress(self, progress, message):
+        self.progress_bar.setValue(progress)
+        self.progress_label.setText(message)
+    
+    def cancel(self):
+        if self.is_running():
+            self.export_thread.stop()
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelando exportação...")
+    
+    def on_finished(self, summary):
+        self.setVisible(False)
+        self.export_finished.emit(summary)
+    
+    def on_error(self, error_message):
+        self.setVisible(False)
+        QMessageBox.critical(self, "Erro", error_message)
+
+
 class CamelotTableDetector(QThread):
     """Thread para detecção automática de tabelas usando Camelot"""
     progress_updated = pyqtSignal(int, str)  # progresso, mensagem
@@ -1184,6 +1668,7 @@ class AdvancedTableDetector(QWidget):
             "Camelot Lattice (PDF com texto - com bordas)",
             "OpenCV (Linhas e Contornos)",
             "OpenCV Multi-Passadas (Múltiplas Tabelas)",
+            "OpenCV Aprimorado (Tabelas Sutis - Paralelo)",
             "Tesseract OCR (Análise de Texto)", 
             "Híbrido (OpenCV + Tesseract)"
         ])
@@ -1195,6 +1680,7 @@ class AdvancedTableDetector(QWidget):
             "• Camelot Lattice: Para PDFs com texto, tabelas com bordas\n"
             "• OpenCV: Detecção baseada em linhas e contornos\n"
             "• OpenCV Multi-Passadas: Para páginas com múltiplas tabelas\n"
+            "• OpenCV Aprimorado: 5 técnicas combinadas, páginas em paralelo\n"
             "• Tesseract OCR: Análise baseada em texto\n"
             "• Híbrido: Combina OpenCV e Tesseract"
         )
@@ -1247,6 +1733,14 @@ class AdvancedTableDetector(QWidget):
         self.min_area_input.setPlaceholderText("3000")
         opencv_layout.addRow("Área Mínima da Tabela:", self.min_area_input)
         
+        self.line_engine_combo = QComboBox()
+        self.line_engine_combo.addItems(["Morfologia (padrão)", "Run-length (mais rápido)"])
+        self.line_engine_combo.setToolTip(
+            "• Morfologia: abertura com kernels 80x1 / 1x80\n"
+            "• Run-length: mantém corridas longas de pixels (mesmo limiar, vetorizado)"
+        )
+        opencv_layout.addRow("Extrator de Linhas:", self.line_engine_combo)
+        
         config_layout.addRow("", self.opencv_group)
         
         # Configurações Tesseract
@@ -1258,6 +1752,14 @@ class AdvancedTableDetector(QWidget):
         self.language_combo.setCurrentText("por")
         tesseract_layout.addRow("Idioma:", self.language_combo)
         
+        self.use_text_layer_check = QCheckBox("Usar texto nativo do PDF (OCR só em páginas escaneadas)")
+        self.use_text_layer_check.setChecked(True)
+        tesseract_layout.addRow("", self.use_text_layer_check)
+        
+        self.roi_ocr_check = QCheckBox("OCR apenas em regiões candidatas (recortes a 300 DPI)")
+        self.roi_ocr_check.setChecked(False)
+        tesseract_layout.addRow("", self.roi_ocr_check)
+        
         config_layout.addRow("", self.tesseract_group)
         
         layout.addWidget(config_section)
@@ -1309,6 +1811,11 @@ class AdvancedTableDetector(QWidget):
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.progress_label)
         
+        # Exportação em segundo plano
+        self.export_panel = ExportProgressPanel()
+        self.export_panel.export_finished.connect(self.on_export_finished)
+        layout.addWidget(self.export_panel)
+        
         # Lista de resultados
         results_section = QGroupBox("📋 Tabelas Detectadas")
         results_layout = QVBoxLayout(results_section)
@@ -1417,12 +1924,20 @@ class AdvancedTableDetector(QWidget):
             min_area = int(self.min_area_input.text() or "5000")
             max_passes = 8  # Aumentado para 8 passadas para detectar mais tabelas
             self.detector_thread = MultiPassTableDetector(self.pdf_path, pages, max_passes)
+        elif "OpenCV Aprimorado" in method:
+            self.detector_thread = EnhancedTableDetector(self.pdf_path, pages)
         elif "OpenCV" in method:
             min_area = int(self.min_area_input.text() or "5000")
-            self.detector_thread = OpenCVTableDetector(self.pdf_path, pages, min_area)
+            line_engine = "runlength" if "Run-length" in self.line_engine_combo.currentText() else "morphology"
+            self.detector_thread = OpenCVTableDetector(self.pdf_path, pages, min_area, line_engine)
         elif "Tesseract" in method:
             language = self.language_combo.currentText()
-            self.detector_thread = TesseractTableDetector(self.pdf_path, pages, language)
+            use_text_layer = self.use_text_layer_check.isChecked()
+            roi_ocr = self.roi_ocr_check.isChecked()
+            self.detector_thread = TesseractTableDetector(
+                self.pdf_path, pages, language, use_text_layer,
+                roi_ocr=roi_ocr, roi_dpi=300 if roi_ocr else None
+            )
         else:  # Híbrido tradicional (OpenCV + Tesseract)
             # Para método híbrido tradicional, vamos executar OpenCV primeiro
             min_area = int(self.min_area_input.text() or "5000")
@@ -1634,13 +2149,17 @@ class AdvancedTableDetector(QWidget):
         QMessageBox.information(self, "Informações da Tabela", info_text)
     
     def export_tables(self):
-        """Exporta tabelas selecionadas"""
+        """Exporta tabelas selecionadas (em segundo plano)"""
         selected_items = self.results_list.selectedItems()
         
         if not selected_items:
             QMessageBox.warning(self, "Aviso", "Selecione ao menos uma tabela!")
             return
         
+        if self.export_panel.is_running():
+            QMessageBox.warning(self, "Aviso", "Aguarde a exportação em andamento terminar!")
+            return
+        
         # Escolher pasta
         out_dir = QFileDialog.getExistingDirectory(self, 'Escolher pasta para salvar tabelas')
         if not out_dir:
@@ -1650,88 +2169,73 @@ class AdvancedTableDetector(QWidget):
         detection_dir = os.path.join(out_dir, 'tabelas_detectadas')
         os.makedirs(detection_dir, exist_ok=True)
         
-        try:
-            doc = fitz.open(self.pdf_path)
-            pdf_base = os.path.splitext(os.path.basename(self.pdf_path))[0]
-            saved_count = 0
-            jsonl_data = []
-            
-            for item in selected_items:
-                table_data = item.data(Qt.UserRole)
-                page_num = table_data['page']
-                bbox = table_data['bbox']
-                
-                # Extrair região da tabela
-                page = doc.load_page(page_num - 1)
-                
-                # CORREÇÃO: Sistema de coordenadas Y (Camelot vs PyMuPDF)
-                page_height = page.rect.height
-                margin = 15  # Margem para capturar conteúdo ao redor
-                
-                # Camelot usa Y crescendo para baixo, PyMuPDF usa Y crescendo para cima
-                # Inverter coordenadas Y
-                expanded_bbox = [
-                    max(0, bbox[0] - margin),
-                    max(0, page_height - bbox[3] - margin),  # Y invertido
-                    min(page.rect.width, bbox[2] + margin),
-                    min(page.rect.height, page_height - bbox[1] + margin)  # Y invertido
-                ]
-                
-                rect = fitz.Rect(expanded_bbox)
-                pix = page.get_pixmap(clip=rect, dpi=200)  # Maior resolução
-                
-                # Converter e salvar
-                img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                
-                method_name = table_data.get('detection_method', 'auto').split('_')[0]
-                table_name = f'{pdf_base}_pag{page_num}_tab{saved_count+1}_{method_name}.png'
-                img_path = os.path.join(detection_dir, table_name)
-                img.save(img_path)
-                
-                # Dados JSONL
-                jsonl_entry = {
-                    "type": "table",
-                    "source": pdf_base,
-                    "page": page_num,
-                    "table_number": saved_count + 1,
-                    "title": f"Tabela Detectada - {method_name.upper()}",
-                    "image_file": table_name,
-                    "extraction_date": datetime.datetime.now().isoformat(),
-                    "detection_method": table_data.get('detection_method', 'unknown'),
-                    "bbox": bbox,
-                    "estimated_dimensions": f"{table_data.get('estimated_rows', '?')}x{table_data.get('estimated_cols', '?')}",
-                    "confidence": table_data.get('confidence', 0.0),
-                    "text": [],
-                    "metadata": {
-                        "conversion_method": "automatic_detection",
-                        "requires_manual_review": table_data.get('confidence', 0) < 0.7,
-                        "confidence_level": "high" if table_data.get('confidence', 0) > 0.8 else "medium" if table_data.get('confidence', 0) > 0.5 else "low"
-                    }
+        pdf_base = os.path.splitext(os.path.basename(self.pdf_path))[0]
+        jobs = []
+        
+        for table_number, item in enumerate(selected_items, 1):
+            table_data = item.data(Qt.UserRole)
+            page_num = table_data['page']
+            bbox = table_data['bbox']
+            
+            method_name = table_data.get('detection_method', 'auto').split('_')[0]
+            table_name = f'{pdf_base}_pag{page_num}_tab{table_number}_{method_name}.png'
+            
+            # Dados JSONL
+            jsonl_entry = {
+                "type": "table",
+                "source": pdf_base,
+                "page": page_num,
+                "table_number": table_number,
+                "title": f"Tabela Detectada - {method_name.upper()}",
+                "image_file": table_name,
+                "extraction_date": datetime.datetime.now().isoformat(),
+                "detection_method": table_data.get('detection_method', 'unknown'),
+                "bbox": bbox,
+                "estimated_dimensions": f"{table_data.get('estimated_rows', '?')}x{table_data.get('estimated_cols', '?')}",
+                "confidence": table_data.get('confidence', 0.0),
+                "text": [],
+                "metadata": {
+                    "conversion_method": "automatic_detection",
+                    "requires_manual_review": table_data.get('confidence', 0) < 0.7,
+                    "confidence_level": "high" if table_data.get('confidence', 0) > 0.8 else "medium" if table_data.get('confidence', 0) > 0.5 else "low"
                 }
-                jsonl_data.append(jsonl_entry)
-                saved_count += 1
-            
-            doc.close()
-            
-            # Salvar JSONL
-            jsonl_file = os.path.join(detection_dir, f'{pdf_base}_deteccao_automatica.jsonl')
-            with open(jsonl_file, 'w', encoding='utf-8') as f:
-                for entry in jsonl_data:
-                    json.dump(entry, f, ensure_ascii=False)
-                    f.write('\n')
+            }
             
+            # CORREÇÃO: bbox com Y crescendo para cima (Camelot), invertido no recorte
+            jobs.append({
+                'image_path': os.path.join(detection_dir, table_name),
+                'dpi': 200,  # Maior resolução
+                'parts': [(page_num - 1, tuple(bbox))],
+                'margin': 15,  # Margem para capturar conteúdo ao redor
+                'bottom_origin': True,
+                'entry': jsonl_entry
+            })
+        
+        self.export_dir = detection_dir
+        jsonl_file = os.path.join(detection_dir, f'{pdf_base}_deteccao_automatica.jsonl')
+        self.export_panel.start(self.pdf_path, jobs, jsonl_file)
+    
+    def on_export_finished(self, summary):
+        """Callback quando a exportação em segundo plano termina"""
+        saved_count = len(summary['saved'])
+        
+        if summary['cancelled']:
             QMessageBox.information(
                 self,
-                "Exportação Concluída",
-                f"🎉 {saved_count} tabela(s) exportada(s)!\n\n"
-                f"📁 Pasta: {detection_dir}\n"
-                f"🖼️ Imagens: {saved_count} arquivos PNG\n"
-                f"📄 Dados: {os.path.basename(jsonl_file)}"
+                "Exportação Cancelada",
+                f"⏹️ Exportação cancelada: {saved_count} imagem(ns) já salva(s) em:\n{self.export_dir}\n"
+                f"📄 Dados: {os.path.basename(summary['jsonl_path'])}"
             )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao exportar: {str(e)}")
-
+            return
+        
+        QMessageBox.information(
+            self,
+            "Exportação Concluída",
+            f"🎉 {saved_count} tabela(s) exportada(s)!\n\n"
+            f"📁 Pasta: {self.export_dir}\n"
+            f"🖼️ Imagens: {saved_count} arquivos PNG\n"
+            f"📄 Dados: {os.path.basename(summary['jsonl_path'])}"
+        )
 
 class CamelotPDFAnalyzer(QWidget):
     """Aba dedicada para análise de PDF com Camelot - sem renderização de imagens"""
@@ -1880,6 +2384,11 @@ class CamelotPDFAnalyzer(QWidget):
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.progress_label)
         
+        # Exportação em segundo plano
+        self.export_panel = ExportProgressPanel()
+        self.export_panel.export_finished.connect(self.on_export_finished)
+        layout.addWidget(self.export_panel)
+        
         # Lista de tabelas detectadas
         tables_section = QGroupBox("📋 Tabelas Detectadas")
         tables_layout = QVBoxLayout(tables_section)
@@ -2123,7 +2632,11 @@ class CamelotPDFAnalyzer(QWidget):
             self._export_tables(self.detected_tables)
     
     def _export_tables(self, tables_to_export):
-        """Exporta as tabelas especificadas"""
+        """Exporta as tabelas especificadas (em segundo plano)"""
+        if self.export_panel.is_running():
+            QMessageBox.warning(self, "Aviso", "Aguarde a exportação em andamento terminar!")
+            return
+        
         # Escolher pasta para salvar
         out_dir = QFileDialog.getExistingDirectory(self, 'Escolher pasta para salvar tabelas Camelot')
         if not out_dir:
@@ -2134,88 +2647,72 @@ class CamelotPDFAnalyzer(QWidget):
         os.makedirs(tabelas_dir, exist_ok=True)
         
         pdf_base = os.path.splitext(os.path.basename(self.pdf_path))[0]
-        saved_count = 0
-        jsonl_data = []
-        
-        try:
-            # Abrir PDF para extrair as imagens das tabelas
-            doc = fitz.open(self.pdf_path)
-            
-            for table in tables_to_export:
-                page_num = table['page']
-                bbox = table['bbox']  # (x1, y1, x2, y2)
-                table_index = table['index']
-                
-                # Carregar página
-                page = doc.load_page(page_num - 1)  # Camelot usa 1-based, fitz usa 0-based
-                
-                # Extrair região da tabela com correção de coordenadas Y
-                page_height = page.rect.height
-                margin = 15  # Margem para capturar conteúdo ao redor das bordas
-                
-                # CORREÇÃO: Camelot usa Y crescendo para baixo, PyMuPDF usa Y crescendo para cima
-                expanded_bbox = [
-                    max(0, bbox[0] - margin),
-                    max(0, page_height - bbox[3] - margin),  # Y invertido
-                    min(page.rect.width, bbox[2] + margin),
-                    min(page.rect.height, page_height - bbox[1] + margin)  # Y invertido
-                ]
-                
-                rect = fitz.Rect(expanded_bbox)
-                pix = page.get_pixmap(clip=rect, dpi=250)  # Alta resolução para melhor qualidade
-                
-                # Converter para QImage
-                img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                
-                # Salvar imagem
-                table_name = f'{pdf_base}_pag{page_num}_tab{table_index}_camelot.png'
-                img_path = os.path.join(tabelas_dir, table_name)
-                img.save(img_path)
-                
-                # Criar dados JSONL
-                jsonl_entry = {
-                    "type": "table",
-                    "source": pdf_base,
-                    "page": page_num,
-                    "table_number": table_index,
-                    "title": f"Tabela Camelot - Página {page_num}, Tabela {table_index}",
-                    "image_file": table_name,
-                    "extraction_date": datetime.datetime.now().isoformat(),
-                    "detection_method": "camelot",
-                    "bbox": bbox,
-                    "shape": table['shape'],
-                    "accuracy": table.get('accuracy', 0.0),
-                    "text": table.get('data', []),
-                    "metadata": {
-                        "conversion_method": "camelot_automatic",
-                        "requires_manual_review": table.get('accuracy', 0) < 0.8,
-                        "confidence": "high" if table.get('accuracy', 0) > 0.8 else "medium" if table.get('accuracy', 0) > 0.5 else "low"
-                    }
+        jobs = []
+        
+        for table in tables_to_export:
+            page_num = table['page']
+            bbox = table['bbox']  # (x1, y1, x2, y2)
+            table_index = table['index']
+            
+            table_name = f'{pdf_base}_pag{page_num}_tab{table_index}_camelot.png'
+            
+            # Criar dados JSONL
+            jsonl_entry = {
+                "type": "table",
+                "source": pdf_base,
+                "page": page_num,
+                "table_number": table_index,
+                "title": f"Tabela Camelot - Página {page_num}, Tabela {table_index}",
+                "image_file": table_name,
+                "extraction_date": datetime.datetime.now().isoformat(),
+                "detection_method": "camelot",
+                "bbox": bbox,
+                "shape": table['shape'],
+                "accuracy": table.get('accuracy', 0.0),
+                "text": table.get('data', []),
+                "metadata": {
+                    "conversion_method": "camelot_automatic",
+                    "requires_manual_review": table.get('accuracy', 0) < 0.8,
+                    "confidence": "high" if table.get('accuracy', 0) > 0.8 else "medium" if table.get('accuracy', 0) > 0.5 else "low"
                 }
-                jsonl_data.append(jsonl_entry)
-                saved_count += 1
-            
-            doc.close()
-            
-            # Salvar arquivo JSONL consolidado
-            jsonl_file = os.path.join(tabelas_dir, f'{pdf_base}_tabelas_camelot.jsonl')
-            with open(jsonl_file, 'w', encoding='utf-8') as f:
-                for entry in jsonl_data:
-                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            }
             
+            # CORREÇÃO: Camelot usa Y crescendo para cima; invertido no recorte
+            jobs.append({
+                'image_path': os.path.join(tabelas_dir, table_name),
+                'dpi': 250,  # Alta resolução para melhor qualidade
+                'parts': [(page_num - 1, tuple(bbox))],  # Camelot usa 1-based, fitz usa 0-based
+                'margin': 15,  # Margem para capturar conteúdo ao redor das bordas
+                'bottom_origin': True,
+                'entry': jsonl_entry
+            })
+        
+        self.export_dir = tabelas_dir
+        jsonl_file = os.path.join(tabelas_dir, f'{pdf_base}_tabelas_camelot.jsonl')
+        self.export_panel.start(self.pdf_path, jobs, jsonl_file)
+    
+    def on_export_finished(self, summary):
+        """Callback quando a exportação em segundo plano termina"""
+        saved_count = len(summary['saved'])
+        
+        if summary['cancelled']:
             QMessageBox.information(
                 self,
-                "Exportação Concluída",
-                f"🎉 {saved_count} tabela(s) exportada(s) com sucesso!\n\n"
-                f"📁 Pasta: {tabelas_dir}\n"
-                f"🖼️ Imagens: {saved_count} arquivos PNG\n"
-                f"📄 Dados: {os.path.basename(jsonl_file)}\n\n"
-                f"💡 Use a aba 'Visualizar Tabelas' para revisar os resultados!"
+                "Exportação Cancelada",
+                f"⏹️ Exportação cancelada: {saved_count} imagem(ns) já salva(s) em:\n{self.export_dir}\n"
+                f"📄 Dados: {os.path.basename(summary['jsonl_path'])}"
             )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao exportar tabelas:\n{str(e)}")
-
+            return
+        
+        QMessageBox.information(
+            self,
+            "Exportação Concluída",
+            f"🎉 {saved_count} tabela(s) exportada(s) com sucesso!\n\n"
+            f"📁 Pasta: {self.export_dir}\n"
+            f"🖼️ Imagens: {saved_count} arquivos PNG\n"
+            f"📄 Dados: {os.path.basename(summary['jsonl_path'])}\n\n"
+            f"💡 Use a aba 'Visualizar Tabelas' para revisar os resultados!"
+        )
 
 class CamelotTableDetectorWidget(QWidget):
     """Widget para detecção automática de tabelas usando Camelot"""
@@ -2433,126 +2930,243 @@ class CamelotTableDetectorWidget(QWidget):
         self.tables_selected.emit(selected_tables)
 
 
-class PDFPageLabel(QLabel):
-    """Label personalizado para exibir páginas do PDF com seleção de tabelas"""
+class PDFPageCanvas(QWidget):
+    """Visualizador virtualizado: desenha apenas as páginas visíveis do PDF
     
-    def __init__(self, image, page_idx, parent):
+    As páginas existem só como retângulos calculados a partir dos tamanhos
+    conhecidos; os rasters vêm do PageRasterStore e páginas ainda não
+    renderizadas aparecem como espaço reservado.
+    """
+    
+    MARGIN = 10
+    SPACING = 10
+    
+    def __init__(self, extractor):
         super().__init__()
-        self.setPixmap(QPixmap.fromImage(image))
-        self.image = image
-        self.page_idx = page_idx
-        self.parent = parent
-        self.rects = []  # lista de (QRect, QColor)
+        self.extractor = extractor
+        self.page_sizes = []  # (largura, altura) em pixels por página
+        self.page_tops = []   # posição Y de cada página no canvas
+        self.rects = {}       # page_idx -> lista de (QRect, QColor)
+        self.drag_pos = None  # Posição do cursor durante a seleção (coordenadas do canvas)
+        self.band_rect = QRect()  # Área do retângulo de preview já desenhado
         self.setMouseTracking(True)
-
+    
+    def set_page_sizes(self, page_sizes):
+        """Define o layout de todas as páginas"""
+        self.page_sizes = list(page_sizes)
+        self.page_tops = []
+        self.rects.clear()
+        
+        y = self.MARGIN
+        for _, height in self.page_sizes:
+            self.page_tops.append(y)
+            y += height + self.SPACING
+        
+        width = max((w for w, _ in self.page_sizes), default=0) + 2 * self.MARGIN
+        self.setFixedSize(width, y - self.SPACING + self.MARGIN)
+        self.update()
+    
+    def page_rect(self, page_idx):
+        """Retângulo da página nas coordenadas do canvas"""
+        width, height = self.page_sizes[page_idx]
+        return QRect(self.MARGIN, self.page_tops[page_idx], width, height)
+    
+    def pages_in(self, top, bottom):
+        """Índices das páginas que intersectam a faixa vertical [top, bottom]"""
+        if not self.page_tops:
+            return range(0)
+        first = max(0, bisect.bisect_right(self.page_tops, top) - 1)
+        if self.page_tops[first] + self.page_sizes[first][1] < top:
+            first += 1
+        last = bisect.bisect_right(self.page_tops, bottom) - 1
+        return range(first, min(last, len(self.page_tops) - 1) + 1)
+    
+    def map_to_page(self, pos):
+        """Converte posição do canvas em (page_idx, posição na página)"""
+        pages = self.pages_in(pos.y(), pos.y())
+        if not pages:
+            return None, None
+        
+        page_idx = pages[0]
+        rect = self.page_rect(page_idx)
+        if pos.y() > rect.bottom():
+            return None, None  # Espaço entre páginas
+        
+        x = min(max(pos.x() - rect.left(), 0), rect.width() - 1)
+        return page_idx, QPoint(x, pos.y() - rect.top())
+    
     def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            if not self.parent.global_select_points:
-                # Primeiro clique: inicia pré-visualização
-                self.parent.preview_info = {
-                    'start': (self.page_idx, event.pos()),
-                    'end': None
-                }
-            else:
-                # Segundo clique: termina pré-visualização
-                if hasattr(self.parent, 'preview_info'):
-                    self.parent.preview_info['end'] = (self.page_idx, event.pos())
-            self.parent.register_click(self.page_idx, event.pos())
-            # Atualiza todos os labels para garantir que o preview suma
-            for label in self.parent.image_labels:
-                if label:
-                    label.update()
-
+        if event.button() != Qt.LeftButton:
+            return
+        
+        page_idx, pos = self.map_to_page(event.pos())
+        if page_idx is None:
+            return
+        
+        extractor = self.extractor
+        dirty_pages = self.preview_pages()
+        if not extractor.global_select_points:
+            # Primeiro clique: inicia pré-visualização
+            extractor.preview_info = {
+                'start': (page_idx, pos),
+                'end': None
+            }
+        else:
+            # Segundo clique: termina pré-visualização
+            if hasattr(extractor, 'preview_info'):
+                extractor.preview_info['end'] = (page_idx, pos)
+        extractor.register_click(page_idx, pos)
+        
+        # Redesenhar só as páginas do preview anterior e do atual
+        self.drag_pos = event.pos()
+        self.update(self.band_rect)
+        self.band_rect = self.rubber_band_rect()
+        for dirty_idx in dirty_pages | self.preview_pages():
+            self.update(self.page_rect(dirty_idx))
+    
+    def mouseMoveEvent(self, event):
+        # Redesenhar só a área que o retângulo de preview ocupava e passa a ocupar
+        if self.is_dragging():
+            self.drag_pos = event.pos()
+            band_rect = self.rubber_band_rect()
+            dirty = self.band_rect.united(band_rect)
+            self.band_rect = band_rect
+            if not dirty.isEmpty():
+                self.update(dirty)
+        super().mouseMoveEvent(event)
+    
+    def is_dragging(self):
+        """Primeiro clique feito e segundo ainda pendente"""
+        preview_info = getattr(self.extractor, 'preview_info', None)
+        return bool(preview_info and preview_info.get('start') and not preview_info.get('end'))
+    
+    def preview_pages(self):
+        """Páginas onde o preview atual é desenhado"""
+        preview_info = getattr(self.extractor, 'preview_info', None) or {}
+        return {point[0] for point in (preview_info.get('start'), preview_info.get('end')) if point}
+    
+    def rubber_band_rect(self):
+        """Área do retângulo de preview durante a seleção, em coordenadas do canvas
+        
+        O retângulo vai do ponto inicial até o cursor, recortado na página
+        inicial, com folga para a espessura da caneta.
+        """
+        if not self.is_dragging() or self.drag_pos is None:
+            return QRect()
+        
+        page_idx, start_pos = self.extractor.preview_info['start']
+        page_rect = self.page_rect(page_idx)
+        band = QRect(page_rect.topLeft() + start_pos, self.drag_pos).normalized()
+        return band.adjusted(-2, -2, 2, 2).intersected(page_rect)
+    
     def paintEvent(self, event):
-        super().paintEvent(event)
         painter = QPainter(self)
+        exposed = event.rect()
         
+        for page_idx in self.pages_in(exposed.top(), exposed.bottom()):
+            target = self.page_rect(page_idx)
+            raster = self.extractor.page_store.get(page_idx)
+            
+            if raster is not None:
+                # Prévias em DPI baixo são ampliadas até a resolução cheia chegar
+                painter.setRenderHint(QPainter.SmoothPixmapTransform, raster.dpi != self.extractor.dpi)
+                painter.drawImage(target, raster.image)
+            else:
+                # Página ainda não renderizada
+                painter.fillRect(target, QColor(236, 240, 241))
+                painter.setPen(QColor(149, 165, 166))
+                painter.drawText(target, Qt.AlignCenter, f"Página {page_idx + 1}")
+            
+            painter.save()
+            painter.translate(target.topLeft())
+            painter.setClipRect(QRect(0, 0, target.width(), target.height()))
+            self.paint_page_overlay(painter, page_idx, target)
+            painter.restore()
+    
+    def paint_page_overlay(self, painter, page_idx, target):
+        """Desenha seleções e preview de uma página (coordenadas da página)"""
         # Desenhar retângulos de seleção
-        for rect, color in self.rects:
+        for rect, color in self.rects.get(page_idx, []):
             pen = QPen(color, 2, Qt.SolidLine)
             painter.setPen(pen)
             painter.drawRect(rect)
         
         # Preview global
-        preview_info = getattr(self.parent, 'preview_info', None)
-        if preview_info:
-            start = preview_info.get('start')
-            end = preview_info.get('end')
-            if start and not end:
-                # Durante arraste
-                if self.page_idx == start[0]:
-                    mouse_pos = self.mapFromGlobal(QCursor.pos())
-                    rect = QRect(start[1], mouse_pos).normalized()
+        preview_info = getattr(self.extractor, 'preview_info', None)
+        if not preview_info:
+            return
+        
+        start = preview_info.get('start')
+        end = preview_info.get('end')
+        if start and not end:
+            # Durante arraste
+            if page_idx == start[0] and self.drag_pos is not None:
+                mouse_pos = self.drag_pos - target.topLeft()
+                rect = QRect(start[1], mouse_pos).normalized()
+                pen = QPen(QColor(255, 0, 0), 2, Qt.DashLine)
+                painter.setPen(pen)
+                painter.drawRect(rect)
+        elif start and end:
+            # Após segundo clique
+            if start[0] == end[0]:
+                # Mesma página: preview vermelho
+                if page_idx == start[0]:
+                    rect = QRect(start[1], end[1]).normalized()
                     pen = QPen(QColor(255, 0, 0), 2, Qt.DashLine)
                     painter.setPen(pen)
                     painter.drawRect(rect)
-            elif start and end:
-                # Após segundo clique
-                if start[0] == end[0]:
-                    # Mesma página: preview vermelho
-                    if self.page_idx == start[0]:
-                        rect = QRect(start[1], end[1]).normalized()
-                        pen = QPen(QColor(255, 0, 0), 2, Qt.DashLine)
-                        painter.setPen(pen)
-                        painter.drawRect(rect)
-                else:
-                    # Entre páginas: preview azul
-                    if self.page_idx == start[0]:
-                        h1 = self.image.height()
-                        x1 = start[1].x()
-                        y1 = start[1].y()
-                        x2 = end[1].x()
-                        poly = QPolygon([
-                            QPoint(x1, y1),
-                            QPoint(x2, y1),
-                            QPoint(x2, h1),
-                            QPoint(x1, h1)
-                        ])
-                        pen = QPen(QColor(0, 0, 255), 2, Qt.DashLine)
-                        painter.setPen(pen)
-                        painter.drawPolygon(poly)
-                    
-                    if self.page_idx == end[0]:
-                        x1 = start[1].x()
-                        x2 = end[1].x()
-                        y2 = end[1].y()
-                        poly = QPolygon([
-                            QPoint(x1, 0),
-                            QPoint(x2, 0),
-                            QPoint(x2, y2),
-                            QPoint(x1, y2)
-                        ])
-                        pen = QPen(QColor(0, 0, 255), 2, Qt.DashLine)
-                        painter.setPen(pen)
-                        painter.drawPolygon(poly)
-
-    def mouseMoveEvent(self, event):
-        # Atualiza todos os labels para garantir que o preview seja desenhado corretamente
-        preview_info = getattr(self.parent, 'preview_info', None)
-        if preview_info and preview_info.get('start') and not preview_info.get('end'):
-            for label in self.parent.image_labels:
-                if label:
-                    label.update()
-        super().mouseMoveEvent(event)
-
-    def add_rect(self, rect, color=QColor(255,0,0)):
-        self.rects.append((rect, color))
-        self.update()
-
+            else:
+                # Entre páginas: preview azul
+                if page_idx == start[0]:
+                    h1 = target.height()
+                    x1 = start[1].x()
+                    y1 = start[1].y()
+                    x2 = end[1].x()
+                    poly = QPolygon([
+                        QPoint(x1, y1),
+                        QPoint(x2, y1),
+                        QPoint(x2, h1),
+                        QPoint(x1, h1)
+                    ])
+                    pen = QPen(QColor(0, 0, 255), 2, Qt.DashLine)
+                    painter.setPen(pen)
+                    painter.drawPolygon(poly)
+                
+                if page_idx == end[0]:
+                    x1 = start[1].x()
+                    x2 = end[1].x()
+                    y2 = end[1].y()
+                    poly = QPolygon([
+                        QPoint(x1, 0),
+                        QPoint(x2, 0),
+                        QPoint(x2, y2),
+                        QPoint(x1, y2)
+                    ])
+                    pen = QPen(QColor(0, 0, 255), 2, Qt.DashLine)
+                    painter.setPen(pen)
+                    painter.drawPolygon(poly)
+    
+    def add_rect(self, page_idx, rect, color=QColor(255,0,0)):
+        self.rects.setdefault(page_idx, []).append((rect, color))
+        self.update(self.page_rect(page_idx))
+    
     def clear_rects(self):
         self.rects.clear()
-        if hasattr(self.parent, 'preview_info'):
-            self.parent.preview_info = {}
+        self.drag_pos = None
+        self.band_rect = QRect()
+        if hasattr(self.extractor, 'preview_info'):
+            self.extractor.preview_info = {}
         self.update()
 
 
 class ImageViewer(QWidget):
     """Tela 2: Visualizador de imagens com conversão automática"""
     
-    def __init__(self):
+    def __init__(self, render_cache=None):
         super().__init__()
         self.image_folder = ""
         self.converter_thread = None
+        self.render_cache = render_cache or RenderCache()
         self.init_ui()
         
     def init_ui(self):
@@ -2668,15 +3282,13 @@ class ImageViewer(QWidget):
         
         layout = QHBoxLayout(widget)
         
-        # Imagem
+        # Imagem (miniatura do cache, sem carregar o original inteiro)
         image_path = os.path.join(self.image_folder, image_file)
-        pixmap = QPixmap(image_path)
+        thumbnail, original_size = self.render_cache.thumbnail(image_path, 300, 350)
         
-        if not pixmap.isNull():
-            # Redimensionar mantendo proporção
-            scaled_pixmap = pixmap.scaled(300, 350, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if not thumbnail.isNull():
             image_label = QLabel()
-            image_label.setPixmap(scaled_pixmap)
+            image_label.setPixmap(QPixmap.fromImage(thumbnail))
             image_label.setAlignment(Qt.AlignCenter)
         else:
             image_label = QLabel("Erro ao carregar imagem")
@@ -2694,8 +3306,8 @@ class ImageViewer(QWidget):
             file_size = os.path.getsize(image_path) / 1024  # KB
             size_label = QLabel(f"Tamanho: {file_size:.1f} KB")
             
-            if not pixmap.isNull():
-                dim_label = QLabel(f"Dimensões: {pixmap.width()} x {pixmap.height()}")
+            if not thumbnail.isNull():
+                dim_label = QLabel(f"Dimensões: {original_size.width()} x {original_size.height()}")
             else:
                 dim_label = QLabel("Dimensões: N/A")
         except:
@@ -2783,15 +3395,29 @@ class PDFTableExtractor(QWidget):
         self.setWindowTitle('Extrator de Tabelas de PDF - Carregamento Progressivo')
         self.resize(1400, 900)
         self.pdf_path = None
-        self.page_images = []
+        self.dpi = 150  # Resolução de exibição e de recorte das seleções
+        self.preview_dpi = 36  # Prévia rápida mostrada antes da resolução cheia
+        self.export_dpi = 300  # Resolução das tabelas salvas (renderizadas do PDF)
+        self.memory_budget_mb = 512  # Orçamento de memória para rasters de páginas
+        self.disk_cache_mb = 2048  # Limite do cache em disco (compartilhado entre sessões)
+        self.render_cache = RenderCache(max_size_mb=self.disk_cache_mb)
+        self.prefetch_pages = 3  # Páginas pré-renderizadas no sentido da rolagem
+        self.frame_budget_ms = 12  # Tempo máximo por rodada ao consumir páginas prontas
+        self.page_store = PageRasterStore(self.memory_budget_mb)
+        self.wanted_pages = set()  # Páginas visíveis + pré-carregadas (não descartar)
+        self.last_scroll_value = 0
         self.selections = []
-        self.image_labels = []
+        self.export_selections = []  # (image_path, seleção) da exportação em andamento
         self.global_select_points = []
         self.loader_thread = None
-        self.loaded_batches = {}
         self.total_pages = 0
-        self.batch_size = 50  # páginas por lote
         self.init_ui()
+        
+        # Consome a fila de páginas prontas em fatias, devolvendo o controle ao event loop
+        self.drain_timer = QTimer(self)
+        self.drain_timer.setSingleShot(True)
+        self.drain_timer.setInterval(0)
+        self.drain_timer.timeout.connect(self.drain_rendered_pages)
 
     def init_ui(self):
         """Inicializa a interface do usuário"""
@@ -2860,16 +3486,41 @@ class PDFTableExtractor(QWidget):
         
         buttons_layout.addStretch()
         
-        # Configurações de lote
-        batch_label = QLabel("Tamanho do lote:")
-        self.batch_spinbox = QSpinBox()
-        self.batch_spinbox.setRange(10, 100)
-        self.batch_spinbox.setValue(self.batch_size)
-        self.batch_spinbox.setSuffix(" páginas")
-        self.batch_spinbox.valueChanged.connect(self.update_batch_size)
-        
-        buttons_layout.addWidget(batch_label)
-        buttons_layout.addWidget(self.batch_spinbox)
+        # Orçamento de memória para as páginas renderizadas
+        memory_label = QLabel("Memória para páginas:")
+        self.memory_spinbox = QSpinBox()
+        self.memory_spinbox.setRange(64, 8192)
+        self.memory_spinbox.setSingleStep(64)
+        self.memory_spinbox.setValue(self.memory_budget_mb)
+        self.memory_spinbox.setSuffix(" MB")
+        self.memory_spinbox.valueChanged.connect(self.update_memory_budget)
+        
+        buttons_layout.addWidget(memory_label)
+        buttons_layout.addWidget(self.memory_spinbox)
+        
+        # Limite do cache de páginas em disco
+        disk_cache_label = QLabel("Cache em disco:")
+        self.disk_cache_spinbox = QSpinBox()
+        self.disk_cache_spinbox.setRange(256, 65536)
+        self.disk_cache_spinbox.setSingleStep(256)
+        self.disk_cache_spinbox.setValue(self.disk_cache_mb)
+        self.disk_cache_spinbox.setSuffix(" MB")
+        self.disk_cache_spinbox.setToolTip(f"Pasta do cache: {self.render_cache.cache_dir}")
+        self.disk_cache_spinbox.valueChanged.connect(self.update_disk_cache_size)
+        
+        buttons_layout.addWidget(disk_cache_label)
+        buttons_layout.addWidget(self.disk_cache_spinbox)
+        
+        # Resolução das tabelas exportadas (independente da exibição)
+        export_dpi_label = QLabel("DPI de exportação:")
+        self.export_dpi_spinbox = QSpinBox()
+        self.export_dpi_spinbox.setRange(72, 1200)
+        self.export_dpi_spinbox.setSingleStep(50)
+        self.export_dpi_spinbox.setValue(self.export_dpi)
+        self.export_dpi_spinbox.valueChanged.connect(self.update_export_dpi)
+        
+        buttons_layout.addWidget(export_dpi_label)
+        buttons_layout.addWidget(self.export_dpi_spinbox)
         
         extraction_layout.addLayout(buttons_layout)
 
@@ -2880,19 +3531,25 @@ class PDFTableExtractor(QWidget):
         self.progress_label.setVisible(False)
         extraction_layout.addWidget(self.progress_bar)
         extraction_layout.addWidget(self.progress_label)
+        
+        # Exportação das seleções em segundo plano
+        self.export_panel = ExportProgressPanel()
+        self.export_panel.export_finished.connect(self.on_export_finished)
+        extraction_layout.addWidget(self.export_panel)
 
-        # Área de scroll para o PDF (apenas seleção manual)
+        # Área de scroll para o PDF (apenas seleção manual), virtualizada
         self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.scroll_content = QFrame()
-        self.scroll_layout = QVBoxLayout(self.scroll_content)
-        self.scroll.setWidget(self.scroll_content)
+        self.scroll.setWidgetResizable(False)
+        self.page_canvas = PDFPageCanvas(self)
+        self.scroll.setWidget(self.page_canvas)
+        self.scroll.verticalScrollBar().valueChanged.connect(self.on_viewport_changed)
+        self.scroll.verticalScrollBar().rangeChanged.connect(self.on_viewport_changed)
         extraction_layout.addWidget(self.scroll)
         
         # Instruções para seleção manual
         manual_instructions = QLabel("""
         <b>Como usar a Seleção Manual:</b><br>
-        • Aguarde o carregamento completo do PDF<br>
+        • As páginas são renderizadas conforme você rola o documento<br>
         • Clique em dois pontos para selecionar uma tabela (mesmo página ou entre páginas)<br>
         • Use "Salvar Tabelas Selecionadas" para extrair as imagens<br>
         • Para detecção automática, use a aba "� Detecção Avançada" (inclui Camelot, OpenCV, Tesseract)
@@ -2903,7 +3560,7 @@ class PDFTableExtractor(QWidget):
         self.tabs.addTab(extraction_tab, "📄 Seleção Manual")
         
         # Tab 2: Visualizador de tabelas
-        self.image_viewer = ImageViewer()
+        self.image_viewer = ImageViewer(self.render_cache)
         self.tabs.addTab(self.image_viewer, "🖼️ Visualizar Tabelas")
         
         # Tab 3: Detecção Avançada
@@ -2916,9 +3573,19 @@ class PDFTableExtractor(QWidget):
         
         main_layout.addWidget(self.tabs)
 
-    def update_batch_size(self, value):
-        """Atualiza o tamanho do lote"""
-        self.batch_size = value
+    def update_memory_budget(self, value):
+        """Atualiza o orçamento de memória das páginas"""
+        self.memory_budget_mb = value
+        self.page_store.set_budget(value, protected=self.wanted_pages)
+
+    def update_disk_cache_size(self, value):
+        """Atualiza o limite do cache em disco"""
+        self.disk_cache_mb = value
+        self.render_cache.set_max_size(value)
+
+    def update_export_dpi(self, value):
+        """Atualiza a resolução das tabelas salvas"""
+        self.export_dpi = value
 
     def open_pdf(self):
         """Abre um arquivo PDF"""
@@ -2956,17 +3623,13 @@ class PDFTableExtractor(QWidget):
             return
         
         # Limpar dados anteriores
-        self.page_images.clear()
-        self.image_labels.clear()
-        self.loaded_batches.clear()
+        self.page_store.clear()
+        self.wanted_pages = set()
+        self.last_scroll_value = 0
         self.selections.clear()
         self.global_select_points.clear()
-        
-        # Limpar layout
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
+        self.preview_info = {}
+        self.page_canvas.set_page_sizes([])
         
         # Configurar interface para carregamento
         self.progress_bar.setVisible(True)
@@ -2974,11 +3637,11 @@ class PDFTableExtractor(QWidget):
         self.progress_bar.setValue(0)
         self.progress_label.setText("Preparando carregamento...")
         
-        # Iniciar thread de carregamento
-        self.loader_thread = PDFLoaderThread(self.pdf_path, self.batch_size, dpi=150)
+        # Iniciar thread de renderização sob demanda
+        self.loader_thread = PDFLoaderThread(self.pdf_path, dpi=self.dpi, cache=self.render_cache)
         self.loader_thread.progress_updated.connect(self.update_loading_progress)
-        self.loader_thread.batch_loaded.connect(self.on_batch_loaded)
-        self.loader_thread.loading_finished.connect(self.on_loading_finished)
+        self.loader_thread.document_loaded.connect(self.on_document_loaded)
+        self.loader_thread.pages_ready.connect(self.on_pages_ready)
         self.loader_thread.error_occurred.connect(self.on_loading_error)
         self.loader_thread.start()
     
@@ -2987,45 +3650,83 @@ class PDFTableExtractor(QWidget):
         self.progress_bar.setValue(progress)
         self.progress_label.setText(message)
     
-    def on_batch_loaded(self, batch_num, batch_pages):
-        """Callback quando um lote de páginas é carregado"""
-        self.loaded_batches[batch_num] = batch_pages
+    def on_document_loaded(self, page_sizes):
+        """Callback com o tamanho de todas as páginas: monta o layout virtual"""
+        if self.sender() is not self.loader_thread:
+            return
+        self.total_pages = len(page_sizes)
+        self.page_canvas.set_page_sizes(page_sizes)
+        self.scroll.verticalScrollBar().setValue(0)
         
-        # Adicionar páginas ao layout
-        for page_idx, img in batch_pages:
-            # Garantir que o array page_images tenha o tamanho correto
-            while len(self.page_images) <= page_idx:
-                self.page_images.append(None)
-            
-            self.page_images[page_idx] = img
-            
-            # Criar label para a página
-            label = PDFPageLabel(img.copy(), page_idx, self)
-            
-            # Garantir que o array image_labels tenha o tamanho correto
-            while len(self.image_labels) <= page_idx:
-                self.image_labels.append(None)
-            
-            self.image_labels[page_idx] = label
-            self.scroll_layout.addWidget(label)
-    
-    def on_loading_finished(self):
-        """Callback quando todo o carregamento termina"""
         self.progress_bar.setVisible(False)
         self.progress_label.setVisible(False)
         
-        # Calcular total de páginas carregadas
-        total_loaded = sum(len(batch) for batch in self.loaded_batches.values())
+        self.on_viewport_changed()
+    
+    def on_viewport_changed(self, *args):
+        """Pede as páginas visíveis e as próximas no sentido da rolagem"""
+        if not self.total_pages or not self.loader_thread:
+            return
+        
+        value = self.scroll.verticalScrollBar().value()
+        direction = 1 if value >= self.last_scroll_value else -1
+        self.last_scroll_value = value
         
-        QMessageBox.information(
-            self, 
-            "Carregamento Concluído",
-            f"PDF carregado com sucesso!\n\n"
-            f"📄 Total de páginas: {total_loaded}\n"
-            f"🎯 Qualidade: 150 DPI (alta qualidade)\n"
-            f"📦 Carregamento por lotes: {self.batch_size} páginas por vez\n\n"
-            f"✨ Agora você pode selecionar tabelas clicando em dois pontos!"
-        )
+        visible = list(self.page_canvas.pages_in(value, value + self.scroll.viewport().height()))
+        if not visible:
+            return
+        
+        # Pré-carregar à frente e uma página no sentido oposto
+        edge = visible[-1] if direction > 0 else visible[0]
+        ahead = [edge + direction * (i + 1) for i in range(self.prefetch_pages)]
+        behind = [visible[0] - 1 if direction > 0 else visible[-1] + 1]
+        wanted = [p for p in visible + ahead + behind if 0 <= p < self.total_pages]
+        
+        self.wanted_pages = set(wanted)
+        
+        # Primeiro prévias das páginas sem nada em memória, depois resolução cheia
+        previews = [(p, self.preview_dpi) for p in wanted if p not in self.page_store]
+        full = [(p, self.dpi) for p in wanted if not self.page_store.has_resolution(p, self.dpi)]
+        self.loader_thread.request_pages(previews + full)
+    
+    def on_pages_ready(self):
+        """A fila do loader tem páginas: agenda o consumo"""
+        if self.sender() is not self.loader_thread:
+            return  # Sinal atrasado de um documento anterior
+        if not self.drain_timer.isActive():
+            self.drain_timer.start()
+    
+    def drain_rendered_pages(self):
+        """Consome páginas prontas até esgotar a fila ou o orçamento do quadro"""
+        if not self.loader_thread:
+            return
+        
+        deadline = time.perf_counter() + self.frame_budget_ms / 1000.0
+        while time.perf_counter() < deadline:
+            item = self.loader_thread.take_rendered()
+            if item is None:
+                return
+            self.on_page_rendered(*item)
+        
+        # Sobrou página na fila: continua na próxima volta do event loop
+        self.drain_timer.start()
+    
+    def on_page_rendered(self, page_idx, raster):
+        """Coloca a página renderizada no store e repinta só a área dela"""
+        if page_idx >= self.total_pages:
+            return
+        self.page_store.put(page_idx, raster, protected=self.wanted_pages)
+        self.page_canvas.update(self.page_canvas.page_rect(page_idx))
+    
+    def to_pdf_point(self, pos):
+        """Posição na página exibida (pixels) -> coordenadas da página (pontos)"""
+        scale = 72.0 / self.dpi
+        return fitz.Point(pos.x() * scale, pos.y() * scale)
+    
+    def to_view_point(self, point):
+        """Coordenadas da página (pontos) -> posição na página exibida (pixels)"""
+        scale = self.dpi / 72.0
+        return QPoint(round(point.x * scale), round(point.y * scale))
     
     def on_loading_error(self, error_message):
         """Callback quando ocorre erro no carregamento"""
@@ -3035,43 +3736,44 @@ class PDFTableExtractor(QWidget):
         QMessageBox.critical(self, "Erro de Carregamento", error_message)
 
     def add_selection(self, selection):
-        """Adiciona uma seleção de tabela"""
+        """Adiciona uma seleção de tabela (pontos em coordenadas do PDF)"""
         self.selections.append(selection)
-        page_idx1, pt1 = selection[0]
-        page_idx2, pt2 = selection[1]
+        page_idx1, pt1 = selection[0][0], self.to_view_point(selection[0][1])
+        page_idx2, pt2 = selection[1][0], self.to_view_point(selection[1][1])
         
         if page_idx1 == page_idx2:
             rect = QRect(pt1, pt2).normalized()
-            if self.image_labels[page_idx1]:
-                self.image_labels[page_idx1].add_rect(rect, color=QColor(255, 0, 0))
+            self.page_canvas.add_rect(page_idx1, rect, color=QColor(255, 0, 0))
         else:
             # Seleção entre páginas
             x1 = pt1.x()
             y1 = pt1.y()
-            h1 = self.image_labels[page_idx1].image.height()
+            h1 = self.page_canvas.page_sizes[page_idx1][1]
             rect1 = QRect(QPoint(x1, y1), QPoint(x1, h1)).normalized()
 
             x2 = pt2.x()
             y2 = pt2.y()
             rect2 = QRect(QPoint(x2, 0), QPoint(x2, y2)).normalized()
 
-            if self.image_labels[page_idx1]:
-                self.image_labels[page_idx1].add_rect(rect1, color=QColor(0, 0, 255))
-            if self.image_labels[page_idx2]:
-                self.image_labels[page_idx2].add_rect(rect2, color=QColor(0, 0, 255))
+            self.page_canvas.add_rect(page_idx1, rect1, color=QColor(0, 0, 255))
+            self.page_canvas.add_rect(page_idx2, rect2, color=QColor(0, 0, 255))
 
     def register_click(self, page_idx, pos):
-        """Registra um clique para seleção"""
-        self.global_select_points.append((page_idx, pos))
+        """Registra um clique para seleção, guardado em coordenadas do PDF"""
+        self.global_select_points.append((page_idx, self.to_pdf_point(pos)))
         if len(self.global_select_points) == 2:
             self.add_selection(tuple(self.global_select_points))
             self.global_select_points = []
 
     def save_tables(self):
-        """Salva as tabelas selecionadas"""
+        """Salva as tabelas selecionadas (em segundo plano)"""
         if not self.selections:
             QMessageBox.information(self, "Aviso", "Nenhuma tabela selecionada para salvar.")
             return
+        
+        if self.export_panel.is_running():
+            QMessageBox.warning(self, "Aviso", "Aguarde a exportação em andamento terminar!")
+            return
             
         out_dir = QFileDialog.getExistingDirectory(self, 'Escolher pasta para salvar tabelas')
         if not out_dir:
@@ -3082,62 +3784,62 @@ class PDFTableExtractor(QWidget):
         os.makedirs(tabelas_dir, exist_ok=True)
             
         pdf_base = os.path.splitext(os.path.basename(self.pdf_path))[0]
-        saved_count = 0
+        jobs = []
         
-        for idx, selection in enumerate(self.selections, 1):
-            page_idx1, pt1 = selection[0]
-            page_idx2, pt2 = selection[1]
-            
-            # Verificar se as páginas foram carregadas
-            if (page_idx1 >= len(self.page_images) or self.page_images[page_idx1] is None or
-                page_idx2 >= len(self.page_images) or self.page_images[page_idx2] is None):
-                QMessageBox.warning(
-                    self, 
-                    "Erro", 
-                    f"Páginas da seleção {idx} ainda não foram carregadas. "
-                    "Aguarde o carregamento completo."
-                )
-                continue
-            
+        # Cada seleção é renderizada direto do PDF na resolução de exportação
+        for idx, ((page_idx1, pt1), (page_idx2, pt2)) in enumerate(self.selections, 1):
             if page_idx1 == page_idx2:
-                rect = QRect(pt1, pt2).normalized()
-                img = self.page_images[page_idx1].copy(rect)
                 page_str = str(page_idx1 + 1)
+                parts = [(page_idx1, tuple(fitz.Rect(pt1, pt2).normalize()))]
             else:
-                # Página de cima
-                h1 = self.page_images[page_idx1].height()
-                x1 = pt1.x()
-                y1 = pt1.y()
-                x2 = pt2.x()
-                left = min(x1, x2)
-                right = max(x1, x2)
-                rect1 = QRect(QPoint(left, y1), QPoint(right, h1)).normalized()
-                img1 = self.page_images[page_idx1].copy(rect1)
-                
-                # Página de baixo
-                y2 = pt2.y()
-                rect2 = QRect(QPoint(left, 0), QPoint(right, y2)).normalized()
-                img2 = self.page_images[page_idx2].copy(rect2)
-                
-                w = max(img1.width(), img2.width())
-                h = img1.height() + img2.height()
-                result = QImage(w, h, QImage.Format_RGB888)
-                result.fill(0)
-                painter = QPainter(result)
-                painter.drawImage(0, 0, img1)
-                painter.drawImage(0, img1.height(), img2)
-                painter.end()
-                img = result
+                # Final da página de cima + início da página de baixo
                 page_str = f'{page_idx1 + 1}-{page_idx2 + 1}'
+                left, right = min(pt1.x, pt2.x), max(pt1.x, pt2.x)
+                parts = [
+                    (page_idx1, (left, pt1.y, right, float('inf'))),
+                    (page_idx2, (left, 0, right, pt2.y))
+                ]
             
             name = f'{pdf_base}_pagina_{page_str}_tabela_{idx}.png'
-            img.save(os.path.join(tabelas_dir, name))
-            saved_count += 1
+            jobs.append({
+                'image_path': os.path.join(tabelas_dir, name),
+                'dpi': self.export_dpi,
+                'parts': parts
+            })
         
-        self.selections.clear()
-        for label in self.image_labels:
-            if label:
-                label.clear_rects()
+        self.export_dir = tabelas_dir
+        # Seleções só saem da tela quando a imagem delas for salva (ver on_export_finished)
+        self.export_selections = [(job['image_path'], selection) for job, selection in zip(jobs, self.selections)]
+        self.export_panel.start(self.pdf_path, jobs)
+    
+    def remove_exported_selections(self, saved_paths):
+        """Remove as seleções cujas imagens foram salvas; as demais continuam marcadas"""
+        saved_paths = set(saved_paths)
+        exported = {id(selection) for path, selection in self.export_selections if path in saved_paths}
+        remaining = [selection for selection in self.selections if id(selection) not in exported]
+        self.export_selections = []
+        
+        self.selections = []
+        self.page_canvas.clear_rects()
+        for selection in remaining:
+            self.add_selection(selection)
+    
+    def on_export_finished(self, summary):
+        """Callback quando a exportação das seleções termina"""
+        tabelas_dir = self.export_dir
+        saved_count = len(summary['saved'])
+        self.remove_exported_selections(summary['saved'])
+        
+        if summary['skipped']:
+            print(f"⚠️ {summary['skipped']} seleção(ões) vazia(s) ignorada(s)")
+        
+        if summary['cancelled']:
+            QMessageBox.information(
+                self,
+                "Exportação Cancelada",
+                f"⏹️ Exportação cancelada: {saved_count} tabela(s) já salva(s) em:\n{tabelas_dir}"
+            )
+            return
         
         QMessageBox.information(
             self, 
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache em disco de renderizações de páginas e miniaturas
+Compartilhado entre sessões: reabrir um PDF já visto não precisa rasterizar de novo
+"""
+
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import fitz  # PyMuPDF
+from PyQt5.QtGui import QImage, QImageReader
+from PyQt5.QtCore import Qt
+
+
+def default_cache_dir():
+    """Pasta padrão do cache (PDF_SCANNER_CACHE_DIR sobrescreve)"""
+    custom_dir = os.getenv("PDF_SCANNER_CACHE_DIR")
+    if custom_dir:
+        return custom_dir
+    
+    base_dir = os.getenv("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "pdf_scanner_progressivo")
+
+
+class RenderCache:
+    """Cache LRU em disco, com limite de tamanho
+    
+    As entradas são identificadas pelo hash do conteúdo do arquivo (não pelo
+    caminho), pela página e pela resolução, então um PDF copiado ou renomeado
+    reaproveita o cache. O hash de cada arquivo é memorizado por
+    (caminho, tamanho, data de modificação) para não reler o arquivo inteiro a
+    cada abertura. A data de modificação das entradas marca o último uso; ao
+    passar do limite, as mais antigas são apagadas.
+    
+    Layout:
+        pages/<hash>/<página>_<dpi>.png
+        thumbs/<hash>_<largura>x<altura>.png
+        hashes.json
+    """
+    
+    def __init__(self, cache_dir=None, max_size_mb=2048, max_pending_mb=64):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.cleanup_lock = threading.Lock()  # Uma limpeza por vez, fora de ``lock``
+        self.used_bytes = None  # Calculado na primeira escrita
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render_cache")
+        self.max_pending_bytes = max_pending_mb * 1024 * 1024
+        self.pending_bytes = 0  # Pixels presos em gravações ainda na fila
+        self.hash_index_path = os.path.join(self.cache_dir, "hashes.json")
+        self.hash_index = self.load_hash_index()
+    
+    def load_hash_index(self):
+        try:
+            with open(self.hash_index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_hash_index(self):
+        """Grava o índice de hashes (escrita atômica, outras sessões podem ler)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.hash_index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.hash_index, f)
+        os.replace(temp_path, self.hash_index_path)
+    
+    def file_signature(self, file_path):
+        """(caminho absoluto, [tamanho, data de modificação]) do arquivo"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        return path, [stat.st_size, stat.st_mtime_ns]
+    
+    def known_content_key(self, file_path):
+        """Hash já memorizado para esta versão do arquivo, sem ler o conteúdo (ou None)"""
+        path, signature = self.file_signature(file_path)
+        with self.lock:
+            entry = self.hash_index.get(path)
+        if entry and entry[:2] == signature:
+            return entry[2]
+        return None
+    
+    def content_key(self, file_path, remember=True):
+        """Hash do conteúdo do arquivo, memorizado por tamanho e data de modificação
+        
+        Com ``remember=False`` (arquivos pequenos) o hash é sempre recalculado
+        e não entra no índice. Na primeira vez lê o arquivo inteiro: para PDFs
+        grandes, chame fora do caminho crítico.
+        """
+        path, signature = self.file_signature(file_path)
+        
+        with self.lock:
+            entry = self.hash_index.get(path)
+            if entry and entry[:2] == signature:
+                return entry[2]
+        
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        key = digest.hexdigest()
+        if not remember:
+            return key
+        
+        with self.lock:
+            self.hash_index = {**self.load_hash_index(), **self.hash_index}
+            self.hash_index[path] = signature + [key]
+            try:
+                self.save_hash_index()
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar o índice do cache: {e}")
+        return key
+    
+    def page_path(self, doc_key, page_idx, dpi):
+        return os.path.join(self.cache_dir, "pages", doc_key, f"{page_idx}_{dpi}.png")
+    
+    def thumbnail_path(self, image_key, width, height):
+        return os.path.join(self.cache_dir, "thumbs", f"{image_key}_{width}x{height}.png")
+    
+    def touch(self, path):
+        """Marca a entrada como usada agora (ordem do LRU)"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def load_page(self, doc_key, page_idx, dpi):
+        """Pixmap RGB da página em cache, ou None"""
+        path = self.page_path(doc_key, page_idx, dpi)
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            pix = fitz.Pixmap(path)
+        except Exception:
+            return None  # Arquivo truncado ou apagado por outra sessão
+        
+        if pix.n != 3 or pix.alpha:
+            return None
+        self.touch(path)
+        return pix
+    
+    def store_page(self, doc_key, page_idx, dpi, raster):
+        """Grava a página em segundo plano (``raster`` é mantido vivo até gravar)
+        
+        Retorna False (sem gravar) se a fila de gravação estiver cheia.
+        """
+        path = self.page_path(doc_key, page_idx, dpi)
+        return self.submit_write(path, raster.image, raster)
+    
+    def submit_write(self, path, image, owner=None):
+        """Agenda a gravação se couber na fila (limitada em bytes)
+        
+        Cada gravação pendente mantém a imagem viva; com a fila cheia a
+        gravação é descartada para não estourar a memória (a página será
+        gravada numa próxima renderização).
+        """
+        size = image.sizeInBytes()
+        with self.lock:
+            if self.pending_bytes and self.pending_bytes + size > self.max_pending_bytes:
+                return False
+            self.pending_bytes += size
+        
+        self.writer.submit(self.write_pending, path, image, owner, size)
+        return True
+    
+    def write_pending(self, path, image, owner, size):
+        try:
+            self.write_image(path, image, owner)
+        finally:
+            with self.lock:
+                self.pending_bytes -= size
+    
+    def thumbnail(self, image_path, width, height):
+        """Miniatura de uma imagem, sem decodificar o original quando já em cache
+        
+        Retorna (QImage da miniatura, QSize original); a QImage é nula se a
+        imagem não puder ser lida.
+        """
+        reader = QImageReader(image_path)
+        original_size = reader.size()
+        if not original_size.isValid():
+            return QImage(), original_size
+        
+        try:
+            path = self.thumbnail_path(self.content_key(image_path, remember=False), width, height)
+        except OSError:
+            path = None
+        
+        if path and os.path.exists(path):
+            thumb = QImage(path)
+            if not thumb.isNull():
+                self.touch(path)
+                return thumb, original_size
+        
+        # Reduz durante a leitura, sem manter o original inteiro em um QPixmap
+        reader.setScaledSize(original_size.scaled(width, height, Qt.KeepAspectRatio))
+        thumb = reader.read()
+        if not thumb.isNull() and path:
+            self.submit_write(path, thumb)
+        return thumb, original_size
+    
+    def write_image(self, path, image, owner=None):
+        """Escrita atômica de uma entrada, seguida da limpeza se passar do limite"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            if not image.save(temp_path, "PNG"):
+                return
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar no cache: {e}")
+            return
+        
+        with self.lock:
+            if self.used_bytes is not None:
+                self.used_bytes += size
+            over_limit = self.used_bytes is None or self.used_bytes > self.max_bytes
+        
+        # Varredura do disco fora do lock (não trava quem está enfileirando)
+        if over_limit:
+            self.cleanup()
+    
+    def cache_entries(self):
+        """(mtime, tamanho, caminho) de todas as entradas em disco"""
+        entries = []
+        for folder in ("pages", "thumbs"):
+            for root, _, files in os.walk(os.path.join(self.cache_dir, folder)):
+                for name in files:
+                    if not name.endswith(".png"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def disk_usage(self):
+        return sum(size for _, size, _ in self.cache_entries())
+    
+    def cleanup(self, target_ratio=0.9):
+        """Apaga as entradas usadas há mais tempo até ficar abaixo do limite
+        
+        Recalcula o uso a partir do disco, já que outras sessões também gravam.
+        Se outra limpeza já estiver em andamento, não faz nada.
+        """
+        if not self.cleanup_lock.acquire(blocking=False):
+            return
+        
+        try:
+            entries = sorted(self.cache_entries())
+            used = sum(size for _, size, _ in entries)
+            target = self.max_bytes * target_ratio
+            
+            if used > self.max_bytes:
+                for _, size, path in entries:
+                    if used <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        used -= size
+                    except OSError:
+                        pass
+            
+            with self.lock:
+                self.used_bytes = used
+        finally:
+            self.cleanup_lock.release()
+    
+    def set_max_size(self, max_size_mb):
+        """Altera o limite e limpa na hora se o cache já passou dele"""
+        with self.lock:
+            self.max_bytes = max_size_mb * 1024 * 1024
+            over_limit = self.used_bytes is None or self.used_bytes > self.max_bytes
+        if over_limit:
+            self.writer.submit(self.cleanup)
+    
+    def close(self):
+        """Aguarda as gravações pendentes"""
+        self.writer.shutdown(wait=True)
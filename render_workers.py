@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processos de renderização do PDFLoaderThread e da exportação de tabelas
+Cada processo abre o próprio documento (PyMuPDF não pode ser compartilhado entre
+threads). O visualizador recebe os pixels em memória compartilhada, sem
+serializar a imagem; a exportação grava os PNGs direto do processo.
+Módulo enxuto e sem Qt, para ser importado com segurança pelos processos (spawn).
+"""
+
+import os
+from multiprocessing import shared_memory
+import fitz  # PyMuPDF
+
+# Documento aberto uma vez por processo
+_worker_doc = None
+_worker_path = None
+
+
+def init_render_worker(pdf_path):
+    """Inicializador do pool: abre o documento deste processo"""
+    open_worker_document(pdf_path)
+
+
+def open_worker_document(pdf_path):
+    """Documento do processo, reaberto só se o caminho mudar"""
+    global _worker_doc, _worker_path
+    if _worker_doc is None or _worker_path != pdf_path:
+        if _worker_doc is not None:
+            _worker_doc.close()
+        _worker_doc = fitz.open(pdf_path)
+        _worker_path = pdf_path
+    return _worker_doc
+
+
+def warm_up():
+    """Tarefa vazia para saber quando os processos já estão prontos"""
+    return os.getpid()
+
+
+def render_page_into(page_idx, dpi, shm_name):
+    """Renderiza a página direto no bloco de memória compartilhada ``shm_name``
+    
+    O bloco é criado (e liberado) por quem pede, já com o tamanho da página
+    nessa resolução; o processo só escreve os pixels. Retorna
+    (largura, altura, stride).
+    """
+    pix = _worker_doc.load_page(page_idx).get_pixmap(dpi=dpi)
+    samples = pix.samples_mv
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        if len(samples) > shm.size:
+            raise ValueError(f"Página {page_idx} não cabe no bloco ({len(samples)} > {shm.size} bytes)")
+        shm.buf[:len(samples)] = samples
+    finally:
+        shm.close()
+    
+    return pix.width, pix.height, pix.stride
+
+
+def table_clip(page, bbox, margin=0, bottom_origin=False):
+    """Retângulo de recorte da tabela na página, limitado às bordas
+    
+    Com ``bottom_origin`` o bbox está no sistema do PDF/Camelot (Y crescendo
+    para cima) e é invertido para o do PyMuPDF. Coordenadas além da página
+    (ex.: ``float('inf')`` para "até o fim") são cortadas na borda.
+    """
+    width, height = page.rect.width, page.rect.height
+    x0, y0, x1, y1 = bbox
+    if bottom_origin:
+        y0, y1 = height - y1, height - y0
+    
+    return fitz.Rect(
+        max(0, x0 - margin),
+        max(0, y0 - margin),
+        min(width, x1 + margin),
+        min(height, y1 + margin)
+    )
+
+
+def stack_pixmaps(pixmaps):
+    """Empilha recortes verticalmente (tabelas que continuam na página seguinte)"""
+    width = max(pix.width for pix in pixmaps)
+    height = sum(pix.height for pix in pixmaps)
+    result = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    result.clear_with(0)
+    
+    y = 0
+    for pix in pixmaps:
+        pix.set_origin(0, y)
+        result.copy(pix, pix.irect)
+        y += pix.height
+    return result
+
+
+def export_table_group(pdf_path, group):
+    """Renderiza e grava as imagens de um grupo de tabelas da mesma página
+    
+    ``group`` é uma lista de (índice, job). Cada job tem 'image_path', 'dpi',
+    'parts' [(page_idx, bbox), ...] e opcionalmente 'margin' e
+    'bottom_origin'. Cada página é carregada uma vez por grupo. Retorna
+    {índice: True se a imagem foi gravada, False se o recorte era vazio}.
+    """
+    doc = open_worker_document(pdf_path)
+    pages = {}
+    results = {}
+    
+    for job_index, job in group:
+        pixmaps = []
+        for page_idx, bbox in job['parts']:
+            if page_idx not in pages:
+                pages[page_idx] = doc.load_page(page_idx)
+            page = pages[page_idx]
+            
+            clip = table_clip(page, bbox, job.get('margin', 0), job.get('bottom_origin', False))
+            if clip.is_empty:
+                break
+            pixmaps.append(page.get_pixmap(dpi=job['dpi'], clip=clip))
+        
+        if len(pixmaps) != len(job['parts']):
+            results[job_index] = False
+            continue
+        
+        pix = pixmaps[0] if len(pixmaps) == 1 else stack_pixmaps(pixmaps)
+        pix.save(job['image_path'])
+        results[job_index] = True
+    
+    return results
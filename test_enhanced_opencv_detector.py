@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do EnhancedTableEngine com entradas sintéticas (sem PDF)
+Os laços abaixo são as implementações anteriores à vetorização, mantidas aqui
+como referência de equivalência; os demais testes fixam o comportamento do
+agrupamento, da consolidação e das faixas de espaçamento.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from enhanced_opencv_detector import EnhancedTableEngine
+
+
+def loop_find_line_intersections(h_lines, v_lines):
+    """Versão original (laço H x V) de find_line_intersections"""
+    intersections = []
+    
+    for hx1, hy1, hx2, hy2 in h_lines:
+        for vx1, vy1, vx2, vy2 in v_lines:
+            h_min_x, h_max_x = min(hx1, hx2), max(hx1, hx2)
+            v_min_y, v_max_y = min(vy1, vy2), max(vy1, vy2)
+            
+            x = (vx1 + vx2) // 2
+            y = (hy1 + hy2) // 2
+            
+            if h_min_x <= x <= h_max_x and v_min_y <= y <= v_max_y:
+                intersections.append((x, y))
+    
+    return intersections
+
+
+def loop_find_regular_spacing(projection, min_distance=30):
+    """Versão original (laço por posição) de find_regular_spacing"""
+    mean_val = np.mean(projection)
+    peaks = []
+    
+    for i in range(1, len(projection) - 1):
+        if (projection[i] > projection[i-1] and
+            projection[i] > projection[i+1] and
+            projection[i] > mean_val):
+            peaks.append(i)
+    
+    filtered_peaks = []
+    for peak in peaks:
+        if not filtered_peaks or abs(peak - filtered_peaks[-1]) > min_distance:
+            filtered_peaks.append(peak)
+    
+    return filtered_peaks
+
+
+def loop_group_text_regions(text_regions, img_height=3000, img_width=2000):
+    """Versão original (grid fixo preenchido em laço) de group_text_regions"""
+    if not text_regions:
+        return []
+    
+    grid_size = 100
+    grid = np.zeros((img_height // grid_size, img_width // grid_size))
+    
+    for x, y, w, h in text_regions:
+        grid_x = min(x // grid_size, grid.shape[1] - 1)
+        grid_y = min(y // grid_size, grid.shape[0] - 1)
+        grid[grid_y, grid_x] += 1
+    
+    threshold = np.percentile(grid[grid > 0], 75)
+    high_density = grid > threshold
+    
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    connected = cv2.morphologyEx(high_density.astype(np.uint8), cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    tables = []
+    for contour in contours:
+        x_grid, y_grid, w_grid, h_grid = cv2.boundingRect(contour)
+        x, y, w, h = x_grid * grid_size, y_grid * grid_size, w_grid * grid_size, h_grid * grid_size
+        if w > 200 and h > 100:
+            tables.append((x, y, w, h, 'text_density'))
+    
+    return tables
+
+
+@pytest.fixture
+def engine():
+    return EnhancedTableEngine("sintetico.pdf")
+
+
+def random_segments(rng, count, horizontal, size=2000):
+    """Segmentos quase horizontais/verticais (como os do HoughLinesP)"""
+    start = rng.integers(0, size, count)
+    end = rng.integers(0, size, count)
+    offset = rng.integers(0, size, count)
+    jitter = rng.integers(-3, 4, count)
+    if horizontal:
+        return [(a, o, b, o + j) for a, b, o, j in zip(start, end, offset, jitter)]
+    return [(o, a, o + j, b) for a, b, o, j in zip(start, end, offset, jitter)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_find_line_intersections_matches_loop(engine, seed):
+    rng = np.random.default_rng(seed)
+    h_lines = random_segments(rng, 60, horizontal=True)
+    v_lines = random_segments(rng, 45, horizontal=False)
+    
+    expected = loop_find_line_intersections(h_lines, v_lines)
+    assert expected  # Entrada com cruzamentos de verdade
+    assert engine.find_line_intersections(h_lines, v_lines) == expected
+
+
+def test_find_line_intersections_grid_and_empty(engine):
+    h_lines = [(100, y, 900, y) for y in range(100, 600, 50)]
+    v_lines = [(x, 100, x, 550) for x in range(100, 950, 100)]
+    
+    assert engine.find_line_intersections(h_lines, v_lines) == loop_find_line_intersections(h_lines, v_lines)
+    assert engine.find_line_intersections([], v_lines) == []
+    assert engine.find_line_intersections(h_lines, []) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("min_distance", [0, 5, 30])
+def test_find_regular_spacing_matches_loop(engine, seed, min_distance):
+    rng = np.random.default_rng(seed)
+    # Projeção com platôs (valores repetidos) e picos regulares
+    projection = rng.integers(0, 20, 1500).astype(np.float64)
+    projection[::37] += 200
+    projection[500:520] = 50
+    
+    assert engine.find_regular_spacing(projection, min_distance) == loop_find_regular_spacing(projection, min_distance)
+
+
+def test_find_regular_spacing_short_projection(engine):
+    assert engine.find_regular_spacing([]) == []
+    for projection in ([5], [1, 3]):
+        assert engine.find_regular_spacing(projection) == loop_find_regular_spacing(np.array(projection))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_group_text_regions_matches_loop(engine, seed):
+    rng = np.random.default_rng(seed)
+    # Texto esparso na página inteira e dois blocos densos (tabelas)
+    regions = [(int(x), int(y), 40, 12) for x, y in zip(rng.integers(0, 2000, 150), rng.integers(0, 3000, 150))]
+    for x0, y0 in ((200, 300), (1100, 1800)):
+        for _ in range(250):
+            regions.append((int(x0 + rng.integers(0, 600)), int(y0 + rng.integers(0, 500)), 40, 12))
+    # Regiões além da borda caem na última célula nas duas versões
+    regions.append((2050, 3100, 40, 12))
+    
+    expected = loop_group_text_regions(regions)
+    assert expected
+    assert engine.group_text_regions(regions, 1, (3000, 2000, 3)) == expected
+
+
+def grid_lines(x, y, cols, rows, col_width, row_height):
+    """Réguas (x1, y1, x2, y2) de uma grade regular"""
+    width, height = cols * col_width, rows * row_height
+    h_lines = [(x, y + j * row_height, x + width, y + j * row_height) for j in range(rows + 1)]
+    v_lines = [(x + i * col_width, y, x + i * col_width, y + height) for i in range(cols + 1)]
+    return h_lines, v_lines
+
+
+def group_grids(engine, *grids):
+    """Agrupa as intersecções de várias grades como em detect_regular_patterns"""
+    h_lines, v_lines = [], []
+    for grid in grids:
+        h, v = grid_lines(*grid)
+        h_lines += h
+        v_lines += v
+    
+    line_mask = np.zeros((1200, 1200), np.uint8)
+    for x1, y1, x2, y2 in h_lines + v_lines:
+        cv2.line(line_mask, (x1, y1), (x2, y2), 255, 2)
+    
+    intersections = engine.find_line_intersections(h_lines, v_lines)
+    return engine.group_intersections_to_tables(intersections, 1, line_mask=line_mask)
+
+
+def test_side_by_side_grids_stay_separate(engine):
+    # Mesmas linhas nas duas grades: os cantos se alinham através do vão
+    tables = group_grids(engine, (100, 100, 3, 4, 100, 40), (600, 100, 3, 4, 100, 40))
+    
+    assert sorted(tables) == [(100, 100, 300, 160, 'intersections'), (600, 100, 300, 160, 'intersections')]
+
+
+def test_stacked_grids_stay_separate(engine):
+    tables = group_grids(engine, (100, 100, 3, 4, 100, 40), (100, 500, 3, 4, 100, 40))
+    
+    assert sorted(tables) == [(100, 100, 300, 160, 'intersections'), (100, 500, 300, 160, 'intersections')]
+
+
+def test_merged_header_row_keeps_table_whole(engine):
+    # Linha de título sem réguas verticais internas
+    h_lines = [(100, y, 400, y) for y in (100, 140, 180, 220)]
+    v_lines = [(100, 100, 100, 220), (400, 100, 400, 220), (200, 140, 200, 220), (300, 140, 300, 220)]
+    line_mask = np.zeros((400, 500), np.uint8)
+    for x1, y1, x2, y2 in h_lines + v_lines:
+        cv2.line(line_mask, (x1, y1), (x2, y2), 255, 2)
+    
+    intersections = engine.find_line_intersections(h_lines, v_lines)
+    
+    assert engine.group_intersections_to_tables(intersections, 1, line_mask=line_mask) == [
+        (100, 100, 300, 120, 'intersections')
+    ]
+
+
+def test_non_maximum_suppression_keeps_higher_ranked_box(engine):
+    boxes = np.array([[100, 100, 300, 200], [110, 105, 300, 200], [600, 100, 200, 100]], dtype=np.float64)
+    
+    kept = engine.non_maximum_suppression(boxes, [0.2, 0.9, 0.5])
+    
+    # A caixa 0 sobrepõe a 1 (mais bem ranqueada); a 2 é disjunta
+    assert kept.tolist() == [1, 2]
+    assert engine.non_maximum_suppression(boxes, [0.9, 0.2, 0.5]).tolist() == [0, 2]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_smart_consolidation_prefers_tight_box_over_loose_duplicate(engine, reverse):
+    img = np.full((800, 1000, 3), 255, np.uint8)
+    for y in range(100, 301, 40):
+        cv2.line(img, (100, y), (400, y), (0, 0, 0), 2)
+    for x in range(100, 401, 60):
+        cv2.line(img, (x, 100), (x, 300), (0, 0, 0), 2)
+    
+    # Caixa folgada (margem em branco) e caixa justa sobre a mesma grade
+    tables = [(80, 80, 345, 245, 'spacing'), (98, 98, 305, 205, 'intersections')]
+    if reverse:
+        tables.reverse()
+    
+    consolidated = engine.smart_consolidation(tables, img, 1)
+    
+    assert [table[:5] for table in consolidated] == [(98, 98, 305, 205, 'intersections')]
+
+
+def test_find_spacing_bands_accepts_regular_peaks(engine):
+    assert engine.find_spacing_bands([100, 140, 180, 220, 260]) == [(100, 260, 5)]
+
+
+def test_find_spacing_bands_rejects_irregular_peaks(engine):
+    # Intervalos alternando 5/20 px: nenhum vão grande, mas espaçamento irregular
+    assert engine.find_spacing_bands([100, 105, 125, 133, 155, 161, 179]) == []
+
+
+def test_find_spacing_bands_splits_at_large_gap(engine):
+    bands = engine.find_spacing_bands([100, 140, 180, 220, 600, 640, 680])
+    
+    assert bands == [(100, 220, 4), (600, 680, 3)]
+    assert engine.find_spacing_bands([100, 140]) == []
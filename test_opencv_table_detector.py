@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do OpenCVTableDetector e do TesseractTableDetector com entradas sintéticas
+PDFs e imagens são gerados no próprio teste; o OCR é substituído por um stub.
+"""
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+
+from opencv_table_detector import OpenCVTableDetector, TesseractTableDetector, count_aligned_anchors
+
+
+def make_pdf(path, pages):
+    """PDF com uma página por item; cada item é uma lista de (x, y, texto)"""
+    doc = fitz.open()
+    for items in pages:
+        page = doc.new_page(width=595, height=842)
+        for x, y, text in items:
+            page.insert_text((x, y), text, fontsize=10)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def draw_grid(mask, x, y, col_widths, row_heights, thickness=2):
+    """Desenha uma grade de réguas na máscara de estrutura"""
+    xs = np.cumsum([x] + col_widths)
+    ys = np.cumsum([y] + row_heights)
+    for yy in ys:
+        cv2.line(mask, (int(xs[0]), int(yy)), (int(xs[-1]), int(yy)), 255, thickness)
+    for xx in xs:
+        cv2.line(mask, (int(xx), int(ys[0])), (int(xx), int(ys[-1])), 255, thickness)
+
+
+def candidate_boxes(mask):
+    return sorted(candidate['bbox'] for candidate in OpenCVTableDetector("x.pdf").find_table_contours(mask))
+
+
+def text_table(rows=6, cols=4):
+    """Tabela em texto nativo: colunas alinhadas em x fixo"""
+    return [(60 + col * 120, 200 + row * 20, f"c{row}_{col}") for row in range(rows) for col in range(cols)]
+
+
+@pytest.fixture
+def ocr_calls(monkeypatch):
+    """Substitui o OCR: registra as páginas enviadas e não encontra tabelas"""
+    calls = []
+    
+    def fake_ocr_batch(self, batch):
+        calls.extend(page_num for page_num, _, _ in batch)
+        return [(page_num, []) for page_num, _, _ in batch]
+    
+    monkeypatch.setattr(TesseractTableDetector, "analyze_ocr_batch", fake_ocr_batch)
+    return calls
+
+
+@pytest.mark.parametrize("header", [["12"], ["Capítulo", "3"]])
+def test_sparse_text_layer_falls_back_to_ocr(tmp_path, ocr_calls, header):
+    # Página escaneada com só o número da página/cabeçalho como texto nativo
+    items = [(60 + i * 80, 40, word) for i, word in enumerate(header)]
+    pdf_path = make_pdf(tmp_path / "escaneado.pdf", [items])
+    
+    TesseractTableDetector(pdf_path).run()
+    
+    assert ocr_calls == [0]
+
+
+def test_text_layer_with_content_skips_ocr(tmp_path, ocr_calls):
+    pdf_path = make_pdf(tmp_path / "nativo.pdf", [[(60, 40, "Título")] + text_table()])
+    detector = TesseractTableDetector(pdf_path)
+    found = []
+    detector.tables_detected.connect(found.extend)
+    
+    detector.run()
+    
+    assert ocr_calls == []
+    assert [table['text_source'] for table in found] == ['text_layer']
+
+
+def test_min_text_layer_words_never_below_table_minimum(tmp_path):
+    detector = TesseractTableDetector(str(tmp_path / "x.pdf"), min_text_layer_words=1)
+    words = [{'text': 'p', 'x': 0, 'y': 0, 'w': 5, 'h': 5}] * (TesseractTableDetector.MIN_TABLE_WORDS - 1)
+    
+    assert not detector.trusts_text_layer(words)
+
+
+def test_border_frame_around_small_table_is_dropped():
+    # Moldura da página (formulário escaneado) com uma tabela pequena dentro
+    mask = np.zeros((1200, 1000), np.uint8)
+    cv2.rectangle(mask, (60, 60), (900, 1000), 255, 2)
+    draw_grid(mask, 100, 100, [100] * 3, [30] * 5)
+    
+    assert candidate_boxes(mask) == [(99, 99, 304, 154)]
+
+
+def test_tight_frame_around_table_is_dropped():
+    mask = np.zeros((1200, 1000), np.uint8)
+    cv2.rectangle(mask, (80, 80), (720, 360), 255, 2)
+    draw_grid(mask, 100, 100, [150] * 4, [40] * 6)
+    
+    assert candidate_boxes(mask) == [(99, 99, 604, 244)]
+
+
+def test_table_with_nested_table_in_a_cell_keeps_both():
+    # A tabela externa tem réguas próprias: não é moldura
+    mask = np.zeros((1200, 1200), np.uint8)
+    draw_grid(mask, 50, 50, [500, 500], [400, 200, 200])
+    draw_grid(mask, 80, 80, [120] * 3, [40] * 5)
+    
+    assert candidate_boxes(mask) == [(49, 49, 1004, 804), (79, 79, 364, 204)]
+
+
+def test_count_aligned_anchors_tolerance_and_uneven_lines():
+    anchors = [100, 300, 500]
+    lines = [
+        [102, 298, 505],       # Todas alinhadas
+        [100, 500],            # Coluna faltando
+        [100, 200, 300, 400],  # Colunas a mais
+        [120, 321],            # Exatamente no limite / além dele
+        [],
+    ]
+    
+    assert count_aligned_anchors(anchors, lines, tolerance=20).tolist() == [3, 2, 2, 1, 0]
+    assert count_aligned_anchors([], lines).tolist() == [0] * len(lines)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_aligned_anchors_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    anchors = rng.integers(0, 2000, 6)
+    lines = [list(rng.integers(0, 2000, rng.integers(0, 9))) for _ in range(40)]
+    
+    expected = [sum(any(abs(x - a) <= 20 for x in line) for a in anchors) for line in lines]
+    assert count_aligned_anchors(anchors, lines, tolerance=20).tolist() == expected
+
+
+def test_group_similarity_divides_by_larger_column_count(tmp_path):
+    detector = TesseractTableDetector(str(tmp_path / "x.pdf"))
+    
+    scores = detector.calculate_group_similarity([100, 300, 500], [[100, 300, 500], [100, 300], [100, 300, 500, 700]])
+    
+    assert scores.tolist() == pytest.approx([1.0, 2 / 3, 3 / 4])
+
+
+def word_lines(rows):
+    """Linhas de palavras (dicts do OCR) a partir de listas de X, 20 px entre linhas"""
+    return [[{'text': f"w{x}", 'x': x, 'y': 200 + i * 20, 'w': 50, 'h': 12} for x in xs]
+            for i, xs in enumerate(rows)]
+
+
+COLUMNS = [60, 180, 300, 420]
+
+
+def test_merged_row_does_not_split_aligned_run(tmp_path):
+    # Linha do meio mesclada/quebrada: palavras fora das colunas
+    lines = word_lines([COLUMNS, COLUMNS, [90, 250], COLUMNS, COLUMNS])
+    detector = TesseractTableDetector(str(tmp_path / "x.pdf"))
+    
+    assert [len(run) for run in detector.segment_aligned_runs(lines)] == [5]
+    
+    tables = detector.find_tables_in_words([word for line in lines for word in line], (1650, 1275))
+    assert [table['row_count'] for table in tables] == [5]
+
+
+def test_two_misaligned_lines_or_trailing_line_end_the_run(tmp_path):
+    detector = TesseractTableDetector(str(tmp_path / "x.pdf"))
+    
+    lines = word_lines([COLUMNS, COLUMNS, COLUMNS, [90, 250], [90, 250], COLUMNS, COLUMNS, COLUMNS])
+    assert [len(run) for run in detector.segment_aligned_runs(lines)] == [3, 3]
+    
+    # A linha desalinhada final não entra na sequência
+    lines = word_lines([COLUMNS, COLUMNS, COLUMNS, [90, 250]])
+    assert [len(run) for run in detector.segment_aligned_runs(lines)] == [3]
+
+
+def test_misaligned_line_tolerated_across_evaluation_blocks(tmp_path):
+    # Linha desalinhada na borda do bloco de 16 linhas avaliado de uma vez
+    rows = [COLUMNS] * 40
+    rows[16] = [90, 250]
+    lines = word_lines(rows)
+    detector = TesseractTableDetector(str(tmp_path / "x.pdf"))
+    
+    assert [len(run) for run in detector.segment_aligned_runs(lines)] == [40]